@@ -0,0 +1,65 @@
+"""
+Tests for the on-disk encode cache.
+"""
+
+import numpy as np
+
+from web_mapplot import cache
+from web_mapplot.cache import EncodeCache, fingerprint
+
+
+def _disk_bytes(directory):
+    return sum(path.stat().st_size for path in directory.glob('*/*.pkl'))
+
+
+def test_fingerprint_sees_any_changed_value_in_large_arrays():
+    array = np.arange(3 * cache.FULL_HASH_BYTES // 8, dtype=np.float64)
+    original = fingerprint(array)
+    assert fingerprint(array.copy()) == original
+
+    array[12345] += 1
+    assert fingerprint(array) != original
+    assert fingerprint(array.astype(np.float32)) != fingerprint(array)
+    assert fingerprint(None) != original
+
+
+def test_key_depends_on_kind_options_and_version(monkeypatch, tmp_path):
+    arrays = [np.arange(10.0)]
+    key = EncodeCache.make_key('delta', arrays, precision=0.1)
+    assert EncodeCache.make_key('delta', arrays, precision=0.1) == key
+    assert EncodeCache.make_key('stats', arrays, precision=0.1) != key
+    assert EncodeCache.make_key('delta', arrays, precision=0.2) != key
+
+    monkeypatch.setattr(cache, 'CACHE_VERSION', cache.CACHE_VERSION + 1)
+    assert EncodeCache.make_key('delta', arrays, precision=0.1) != key
+
+
+def test_get_or_compute_hits_after_first_miss(tmp_path):
+    store = EncodeCache(tmp_path)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'values': [1, 2, 3]}
+
+    first = store.get_or_compute('kind', [np.arange(4)], compute, option=1)
+    second = EncodeCache(tmp_path).get_or_compute('kind', [np.arange(4)], compute, option=1)
+    assert first == second == {'values': [1, 2, 3]}
+    assert len(calls) == 1
+
+
+def test_eviction_keeps_running_total_within_budget(tmp_path):
+    store = EncodeCache(tmp_path, max_bytes=6000)
+    keys = [store.make_key('x', [np.arange(i)]) for i in range(20)]
+    for key in keys:
+        store.put(key, np.zeros(100))
+        assert store._total_bytes == _disk_bytes(tmp_path) <= store.max_bytes
+
+    # Least recently used entries go first
+    assert store.get(keys[0]) is None
+    assert store.get(keys[-1]) is not None
+
+    # Replacing an entry accounts for the file it overwrites
+    store.put(keys[-1], np.zeros(10))
+    assert store._total_bytes == _disk_bytes(tmp_path)
+    assert EncodeCache(tmp_path)._total_bytes == store._total_bytes
@@ -0,0 +1,74 @@
+"""
+Tests for content-addressed chunks and publishing.
+"""
+
+import json
+
+import numpy as np
+
+from web_mapplot import MapPlot, publish
+from web_mapplot.chunkstore import ChunkStore, LocalDirectoryBackend, chunk_key, referenced_chunks
+
+
+def _plot(seed):
+    lon, lat = np.meshgrid(np.linspace(0, 10, 20), np.linspace(0, 8, 15))
+    data = np.random.default_rng(seed).random((3, 15, 20))
+    mp = MapPlot(title='test')
+    mp.add_variable('sst', lon, lat, data, plot_type='scatter')
+    return mp, data
+
+
+def _chunk_files(root):
+    return {path.relative_to(root).as_posix() for path in root.rglob('*') if path.is_file()}
+
+
+def test_identical_chunks_are_stored_once(tmp_path):
+    store = ChunkStore(tmp_path)
+    first = store.put(b'abc')
+    assert store.put(b'abc') == first == chunk_key(b'abc')
+    assert store.put(b'abd') != first
+    assert (store.written, store.reused) == (2, 1)
+    assert (tmp_path / first).read_bytes() == b'abc'
+
+
+def test_referenced_chunks_walks_nested_descriptors():
+    manifest = {'variables': {
+        'a': {'data': {'location': 'sidecar', 'chunks': ['chunks/1']}},
+        'b': {'raster': {'bands': [{'frames': {'location': 'sidecar', 'chunks': ['chunks/2', 'chunks/3']}}]}}
+    }}
+    assert referenced_chunks(manifest) == {'chunks/1', 'chunks/2', 'chunks/3'}
+
+
+def test_publish_uploads_new_chunks_and_prunes_stale_ones(tmp_path, capsys):
+    html = tmp_path / 'site' / 'dash.html'
+    html.parent.mkdir()
+    target = tmp_path / 'public'
+
+    mp, _ = _plot(1)
+    mp.save_html(str(html), data_mode='sidecar')
+    stats = publish(html, target)
+    assert stats['uploaded'] > 0 and stats['skipped'] == 0 and stats['pruned'] == 0
+    assert (target / 'dash.html').exists()
+
+    assert publish(html, target) == {'uploaded': 0, 'skipped': stats['uploaded'], 'pruned': 0}
+
+    mp, _ = _plot(2)
+    mp.save_html(str(html), data_mode='sidecar')
+    stats = publish(html, target)
+    assert stats['pruned'] > 0
+
+    manifest = json.loads((html.parent / 'dash_data' / 'manifest.json').read_text())
+    expected = {key[len('chunks/'):] for key in referenced_chunks(manifest)}
+    assert _chunk_files(target / 'dash_data' / 'chunks') == expected
+    assert _chunk_files(html.parent / 'dash_data' / 'chunks') == expected
+
+
+def test_local_backend_lists_and_deletes(tmp_path):
+    backend = LocalDirectoryBackend(tmp_path)
+    backend.put('d/chunks/ab/abc.bin', b'1')
+    backend.put('d/manifest.json', b'{}')
+    assert list(backend.keys('d/chunks/')) == ['d/chunks/ab/abc.bin']
+    backend.delete('d/chunks/ab/abc.bin')
+    assert list(backend.keys('d/chunks/')) == []
+    assert not (tmp_path / 'd' / 'chunks' / 'ab').exists()
+    assert list(backend.keys('missing/')) == []
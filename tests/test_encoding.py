@@ -0,0 +1,106 @@
+"""
+Round-trip tests for the binary array and geometry encodings.
+"""
+
+import numpy as np
+import pytest
+
+from web_mapplot.encoding import (
+    decode_delta, decode_float32, decode_geometry, decode_mask, dequantize, encode_delta,
+    encode_float32, encode_geometry, encode_mask, pack_varints, quantize, unpack_varints,
+    validity_mask
+)
+
+
+def _cube(shape=(7, 12, 15), seed=0):
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.normal(size=shape), axis=0) * 3 + 280
+
+
+def test_quantize_round_trip_within_half_step():
+    data = _cube()
+    data[2, 3, 4] = np.nan
+    codes = quantize(data, 0.01, 270.0)
+    restored = dequantize(codes, 0.01, 270.0)
+    assert np.isnan(restored[2, 3, 4])
+    assert np.nanmax(np.abs(restored - data)) <= 0.005 + 1e-9
+
+
+@pytest.mark.parametrize('keyframe_interval', [1, 3, 10])
+def test_delta_round_trip(keyframe_interval):
+    data = _cube()
+    data[0, 0, :5] = np.nan
+    data[4, 2, 2] = np.nan
+    payload = encode_delta(data, keyframe_interval=keyframe_interval, precision=0.001)
+    assert len(payload['chunks']) == -(-data.shape[0] // keyframe_interval)
+
+    restored = decode_delta(payload)
+    assert restored.shape == data.shape
+    np.testing.assert_array_equal(np.isnan(restored), np.isnan(data))
+    assert np.nanmax(np.abs(restored - data)) <= 0.0005 + 1e-9
+
+
+def test_delta_rejects_bad_input():
+    with pytest.raises(ValueError):
+        encode_delta(np.zeros((4, 5)))
+    with pytest.raises(ValueError):
+        encode_delta(np.zeros((2, 4, 5)), keyframe_interval=0)
+
+
+def test_masked_encodings_store_only_valid_cells():
+    data = _cube()
+    land = np.zeros(data.shape[1:], dtype=bool)
+    land[:, :10] = True
+    data[:, land] = np.nan
+
+    valid = validity_mask([data])
+    np.testing.assert_array_equal(valid, ~land)
+
+    floats = encode_float32(data, valid)
+    restored = decode_float32(floats, valid)
+    np.testing.assert_array_equal(np.isnan(restored), np.isnan(data))
+    np.testing.assert_allclose(restored[:, valid], data[:, valid].astype(np.float32))
+
+    delta = encode_delta(data, precision=0.001, valid=valid)
+    restored = decode_delta(delta, valid)
+    np.testing.assert_array_equal(np.isnan(restored), np.isnan(data))
+    assert np.nanmax(np.abs(restored - data)) <= 0.0005 + 1e-9
+
+
+def test_validity_mask_skips_mostly_valid_fields():
+    data = _cube()
+    data[:, 0, 0] = np.nan
+    assert validity_mask([data, None]) is None
+
+
+def test_mask_round_trip():
+    rng = np.random.default_rng(1)
+    valid = rng.random((13, 17)) > 0.6
+    payload = encode_mask(valid)
+    assert payload['count'] == int(valid.sum())
+    np.testing.assert_array_equal(decode_mask(payload), valid)
+
+
+def test_varint_round_trip():
+    values = np.array([0, 1, 127, 128, 300, 16383, 16384, 2 ** 35, 2 ** 63 + 5], dtype=np.uint64)
+    packed = pack_varints(values)
+    assert len(pack_varints(np.array([127], dtype=np.uint64))) == 1
+    assert len(pack_varints(np.array([128], dtype=np.uint64))) == 2
+    np.testing.assert_array_equal(unpack_varints(packed), values)
+    assert unpack_varints(b'').size == 0
+
+
+def test_geometry_round_trip():
+    rng = np.random.default_rng(2)
+    parts = [np.cumsum(rng.normal(size=(n, 2)), axis=0) for n in (1, 5, 40)]
+    payload = encode_geometry(parts, precision=0.01)
+    decoded = decode_geometry(payload)
+    assert len(decoded) == len(parts)
+    for original, restored in zip(parts, decoded):
+        assert restored.shape == original.shape
+        assert np.max(np.abs(restored - original)) <= 0.005 + 1e-9
+
+
+def test_geometry_rejects_non_positive_precision():
+    with pytest.raises(ValueError):
+        encode_geometry([np.zeros((2, 2))], precision=0)
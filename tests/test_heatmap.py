@@ -0,0 +1,67 @@
+"""
+Tests for kernel density heatmaps.
+"""
+
+import numpy as np
+import pytest
+
+from web_mapplot.heatmap import gaussian_blur, kde_heatmap, kde_surface
+
+
+def _points(seed=0, count=400):
+    rng = np.random.default_rng(seed)
+    lon = rng.normal(10, 2, count)
+    lat = rng.normal(45, 1.5, count)
+    data = rng.random((3, count))
+    return lon, lat, data
+
+
+def test_gaussian_blur_preserves_mass_away_from_edges():
+    image = np.zeros((61, 61))
+    image[30, 30] = 1.0
+    blurred = gaussian_blur(image, 3.0, 5.0)
+    assert blurred.sum() == pytest.approx(1.0, rel=1e-6)
+    assert np.unravel_index(np.argmax(blurred), blurred.shape) == (30, 30)
+    # Wider kernel along rows spreads further vertically
+    assert blurred[30 + 6, 30] > blurred[30, 30 + 6]
+
+
+def test_kde_heatmap_bands_and_bounds():
+    lon, lat, data = _points()
+    heatmap = kde_heatmap(lon, lat, data, 0.0, 1.0, bandwidth=0.5)
+    assert [band['min_zoom'] for band in heatmap['bands']] == sorted(band['min_zoom'] for band in heatmap['bands'])
+    for band in heatmap['bands']:
+        assert len(band['frames']) == 3
+        (south, west), (north, east) = band['bounds']
+        assert south < lat.min() and north > lat.max()
+        assert west < lon.min() and east > lon.max()
+
+
+def test_kde_heatmap_rejects_bad_input():
+    lon, lat, data = _points()
+    with pytest.raises(ValueError):
+        kde_heatmap(lon, lat, data, 0.0, 1.0, bandwidth=-1)
+    with pytest.raises(ValueError):
+        kde_heatmap(np.full(4, np.nan), np.full(4, np.nan), np.ones((1, 4)), 0.0, 1.0)
+
+
+def test_kde_surface_is_normalized_over_all_frames():
+    lon, lat, data = _points()
+    data[1] *= 0.5
+    lon_axis, lat_axis, frames = kde_surface(lon, lat, data, 0.0, 1.0, zoom=6, bandwidth=0.5)
+    frames = list(frames)
+    assert len(frames) == 3
+    assert all(frame.shape == (lat_axis.size, lon_axis.size) for frame in frames)
+    assert np.all(np.diff(lon_axis) > 0) and np.all(np.diff(lat_axis) < 0)
+    assert max(frame.max() for frame in frames) == pytest.approx(1.0)
+    assert frames[1].max() < max(frames[0].max(), frames[2].max())
+
+
+def test_kde_surface_subset_matches_the_full_normalization():
+    lon, lat, data = _points()
+    _, _, full = kde_surface(lon, lat, data, 0.0, 1.0, zoom=6, bandwidth=0.5)
+    _, _, subset = kde_surface(lon, lat, data, 0.0, 1.0, zoom=6, bandwidth=0.5, times=[2, 0])
+    full, subset = list(full), list(subset)
+    assert len(subset) == 2
+    np.testing.assert_array_equal(subset[0], full[0])
+    np.testing.assert_array_equal(subset[1], full[2])
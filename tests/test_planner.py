@@ -0,0 +1,65 @@
+"""
+Tests for output size planning.
+"""
+
+import numpy as np
+import pytest
+
+from web_mapplot import MapPlot
+from web_mapplot.planner import MIN_FRAMES, plan_output
+
+
+@pytest.fixture
+def mapplot():
+    lon, lat = np.meshgrid(np.linspace(0, 20, 120), np.linspace(0, 15, 90))
+    data = np.random.default_rng(0).random((16, 90, 120))
+    mp = MapPlot(title='plan')
+    mp.add_variable('sst', lon, lat, data, plot_type='filled_contour')
+    return mp
+
+
+def test_generous_budget_changes_nothing(mapplot):
+    plan = mapplot.plan_output(max_bytes=1e9)
+    assert plan['fits'] and plan['steps'] == [] and plan['data_mode'] == 'inline'
+    choice = plan['variables']['sst']
+    assert (choice['encoding'], choice['frame_step'], choice['stride']) == ('raw', 1, 1)
+
+
+def test_auto_mode_moves_data_to_sidecar_before_decimating(mapplot):
+    fixed = mapplot.plan_output(max_bytes=1)['fixed_bytes']
+    plan = mapplot.plan_output(max_bytes=fixed + 300000, data_mode='auto')
+    assert plan['fits'] and plan['data_mode'] == 'sidecar'
+    assert plan['steps'][:2] == ['delta encoding', 'sidecar placement']
+
+
+def test_tight_inline_budget_decimates_within_the_floor(mapplot):
+    fixed = mapplot.plan_output(max_bytes=1)['fixed_bytes']
+    plan = mapplot.plan_output(max_bytes=fixed + 60000, data_mode='inline')
+    assert plan['fits'] and plan['data_mode'] == 'inline'
+    choice = plan['variables']['sst']
+    assert choice['shape'][0] >= MIN_FRAMES
+    assert choice['frame_step'] > 1 or choice['stride'] > 1
+
+
+def test_budget_below_fixed_part_returns_unchanged_plan(mapplot):
+    plan = mapplot.plan_output(max_bytes=1000, data_mode='auto')
+    assert not plan['fits']
+    assert plan['fixed_bytes'] >= 1000
+    assert plan['steps'] == [] and plan['data_mode'] == 'inline'
+    assert plan['variables']['sst']['shape'] == [16, 90, 120]
+
+
+def test_unreachable_floor_skips_decimation(mapplot):
+    fixed = mapplot.plan_output(max_bytes=1)['fixed_bytes']
+    plan = mapplot.plan_output(max_bytes=fixed + 10, data_mode='inline')
+    assert not plan['fits']
+    assert plan['variables']['sst']['shape'] == [16, 90, 120]
+
+
+def test_plan_output_validates_arguments(mapplot):
+    with pytest.raises(ValueError):
+        mapplot.plan_output()
+    with pytest.raises(ValueError):
+        plan_output({}, {}, 0)
+    with pytest.raises(ValueError):
+        plan_output({}, {}, 100, data_mode='remote')
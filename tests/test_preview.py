@@ -0,0 +1,31 @@
+"""
+Tests for the decimated first-frame preview.
+"""
+
+import numpy as np
+
+from web_mapplot import MapPlot
+from web_mapplot.preview import PREVIEW_POINTS, build_preview
+
+
+def test_preview_holds_one_decimated_frame_of_the_first_variable():
+    lon, lat = np.meshgrid(np.linspace(0, 20, 300), np.linspace(30, 45, 200))
+    data = np.random.default_rng(0).random((5, 200, 300))
+    mp = MapPlot(title='preview')
+    mp.add_variable('sst', lon, lat, data, plot_type='filled_contour')
+    mp.add_variable('other', lon, lat, data, plot_type='scatter')
+
+    preview = build_preview(mp._build_payload(), mp._arrays)
+    assert list(preview['variables']) == ['sst']
+    variable = preview['variables']['sst']
+    frames, ny, nx = variable['shape']
+    assert frames == 1 and max(ny, nx) <= PREVIEW_POINTS
+    assert np.asarray(variable['data'][0]).shape == (ny, nx)
+    assert np.asarray(variable['lon']).shape == (ny, nx)
+    assert len(variable['timestamps']) == 1
+    assert 'masks' not in preview
+    np.testing.assert_allclose(variable['data'][0], data[0, ::5, ::5], atol=1e-3)
+
+
+def test_no_preview_without_variables():
+    assert build_preview({'variables': {}}, {}) is None
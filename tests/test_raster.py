@@ -0,0 +1,73 @@
+"""
+Tests for server-side colorized overlays, projections and PNG encoding.
+"""
+
+import base64
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from web_mapplot.raster import (
+    colorize, color_lut, encode_png, mercator_y, projection_y, render_raster, world_mercator_y
+)
+
+
+def decode_png(raw: bytes) -> np.ndarray:
+    """Decode an RGBA PNG written by encode_png (filter type 0 rows)."""
+    assert raw[:8] == b'\x89PNG\r\n\x1a\n'
+    position, idat = 8, b''
+    while position < len(raw):
+        length, kind = struct.unpack('>I4s', raw[position:position + 8])
+        body = raw[position + 8:position + 8 + length]
+        if kind == b'IHDR':
+            width, height = struct.unpack('>II', body[:8])
+        elif kind == b'IDAT':
+            idat += body
+        position += 12 + length
+    rows = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(height, 1 + 4 * width)
+    assert (rows[:, 0] == 0).all()
+    return rows[:, 1:].reshape(height, width, 4)
+
+
+def test_png_round_trip():
+    rgba = np.random.default_rng(0).integers(0, 256, size=(7, 9, 4), dtype=np.uint8)
+    np.testing.assert_array_equal(decode_png(encode_png(rgba)), rgba)
+
+
+def test_colorize_bands_and_transparency():
+    lut = color_lut(['#000000', '#ffffff'])
+    values = np.array([[np.nan, -1.0, 0.0, 0.49, 0.5, 1.0]])
+    rgba = colorize(values, lut, 0.0, 1.0, levels=2)
+    np.testing.assert_array_equal(rgba[0, :, 3], [0, 0, 255, 255, 255, 255])
+    assert (rgba[0, 2, :3] == rgba[0, 3, :3]).all()
+    assert (rgba[0, 3, :3] != rgba[0, 4, :3]).any()
+
+
+def test_world_mercator_matches_epsg_3395():
+    # Reference northings in metres on the WGS84 ellipsoid
+    lat = np.array([0.0, 30.0, 60.0])
+    np.testing.assert_allclose(world_mercator_y(lat) * 6378137.0, [0.0, 3482189.09, 8362698.55], atol=0.05)
+    assert abs(world_mercator_y(np.array([45.0]))[0] - mercator_y(np.array([45.0]))[0]) > 1e-3
+    assert projection_y('EPSG3857') is mercator_y
+    assert projection_y('EPSG3395') is world_mercator_y
+    assert projection_y('EPSG4326') is None
+
+
+def test_render_raster_rows_follow_the_projection():
+    lon, lat = np.meshgrid(np.linspace(0, 10, 11), np.linspace(0, 60, 61))
+    data = lat[None].copy()
+    raster = render_raster(lon, lat, data, 'viridis', 0, 60, levels=60, projection='EPSG3857')
+    band, = raster['bands']
+    (south, west), (north, east) = band['bounds']
+    assert (south, west, north, east) == pytest.approx((-0.5, -0.5, 60.5, 10.5))
+
+    image = decode_png(base64.b64decode(band['frames'][0].split(',', 1)[1]))
+    assert image.shape == (61, 11, 4)
+    # Mercator stretches high latitudes, so more image rows show the northern bands
+    colors = [tuple(row) for row in image[:, 0, :3]]
+    assert colors[:10].count(colors[0]) > colors[-10:].count(colors[-1])
+
+    with pytest.raises(ValueError):
+        render_raster(lon + 0.1 * lat, lat, data, 'viridis', 0, 60)
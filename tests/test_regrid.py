@@ -0,0 +1,68 @@
+"""
+Tests for regridding curvilinear meshes onto regular grids.
+"""
+
+import numpy as np
+import pytest
+
+from web_mapplot.regrid import Regridder, regular_grid
+
+
+def _rotated_mesh(ny=30, nx=40, angle=20):
+    """Curvilinear mesh: a rotated, slightly sheared grid."""
+    j, i = np.meshgrid(np.arange(nx, dtype=np.float64), np.arange(ny, dtype=np.float64))
+    theta = np.deg2rad(angle)
+    lon = 0.25 * (j * np.cos(theta) - i * np.sin(theta)) + 0.01 * i * j / nx
+    lat = 0.25 * (j * np.sin(theta) + i * np.cos(theta))
+    return lon, lat
+
+
+def _linear(lon, lat):
+    return 3.0 * lon - 2.0 * lat + 7.0
+
+
+@pytest.mark.parametrize('mesh', ['rectilinear', 'curvilinear'])
+def test_bilinear_is_exact_on_a_linear_field(mesh):
+    if mesh == 'rectilinear':
+        lon, lat = np.meshgrid(np.linspace(0, 10, 21), np.linspace(-5, 5, 11))
+    else:
+        lon, lat = _rotated_mesh()
+    target_lon, target_lat = regular_grid(lon, lat, resolution=0.3)
+    regridder = Regridder(lon, lat, target_lon, target_lat, method='bilinear')
+    result = regridder(_linear(lon, lat)[None])[0]
+
+    target = _linear(*regridder.target_mesh())
+    inside = np.isfinite(result)
+    assert inside.mean() > 0.3
+    np.testing.assert_allclose(result[inside], target[inside], atol=1e-9)
+
+
+def test_conservative_preserves_a_constant_field():
+    lon, lat = _rotated_mesh()
+    target_lon, target_lat = regular_grid(lon, lat, resolution=1.0)
+    regridder = Regridder(lon, lat, target_lon, target_lat, method='conservative')
+    result = regridder(np.full((2,) + lon.shape, 4.0))
+    inside = np.isfinite(result)
+    assert inside.any()
+    np.testing.assert_allclose(result[inside], 4.0)
+
+
+def test_missing_source_values_respect_min_coverage():
+    lon, lat = np.meshgrid(np.linspace(0, 10, 21), np.linspace(0, 10, 21))
+    data = np.ones(lon.shape)
+    data[:, :10] = np.nan
+    regridder = Regridder(lon, lat, np.linspace(0.25, 9.75, 20), np.linspace(0.25, 9.75, 20), min_coverage=0.99)
+    result = regridder(data)
+    assert np.isnan(result[:, :9]).all()
+    np.testing.assert_allclose(result[:, 11:], 1.0)
+
+
+def test_regridder_validates_input():
+    lon, lat = np.meshgrid(np.linspace(0, 1, 3), np.linspace(0, 1, 3))
+    with pytest.raises(ValueError):
+        Regridder(lon, lat, [0, 1], [0, 1], method='nearest')
+    with pytest.raises(ValueError):
+        Regridder(lon, lat, [0, 0.1, 0.5], [0, 1])
+    regridder = Regridder(lon, lat, [0, 0.5, 1], [0, 0.5, 1])
+    with pytest.raises(ValueError):
+        regridder(np.zeros((4, 4)))
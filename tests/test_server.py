@@ -0,0 +1,34 @@
+"""
+Tests for the aggregation of render timings reported by pages.
+"""
+
+import pytest
+
+from web_mapplot.server import PerfLog
+
+
+def _timing(variable, kind, count, total_ms, max_ms, plot_type='scatter'):
+    return {'variable': variable, 'plot_type': plot_type, 'kind': kind,
+            'count': count, 'total_ms': total_ms, 'max_ms': max_ms}
+
+
+def test_reports_are_summed_per_variable_plot_type_and_kind():
+    log = PerfLog()
+    log.add({'timings': [_timing('sst', 'render', 2, 10.0, 7.0), _timing('all', 'frame', 1, 30.0, 30.0, None)]})
+    log.add({'timings': [_timing('sst', 'render', 3, 6.0, 4.0)]})
+
+    assert log.reports == 2
+    rows = log.report()
+    assert [row['variable'] for row in rows] == ['all', 'sst']
+    frame, render = rows
+    assert frame['plot_type'] is None
+    assert (render['count'], render['total_ms'], render['max_ms']) == (5, 16.0, 7.0)
+    assert render['mean_ms'] == pytest.approx(3.2)
+
+
+@pytest.mark.parametrize('report', [None, {}, {'timings': 'x'}, {'timings': [{'variable': 'sst'}]}])
+def test_malformed_reports_are_rejected(report):
+    log = PerfLog()
+    with pytest.raises(ValueError):
+        log.add(report)
+    assert log.reports == 0
@@ -0,0 +1,25 @@
+"""
+Tests for sidecar data exports.
+"""
+
+import json
+
+import numpy as np
+
+from web_mapplot import MapPlot
+
+
+def test_sidecar_frames_round_trip(tmp_path, capsys):
+    lon, lat = np.meshgrid(np.linspace(0, 10, 20), np.linspace(0, 8, 15))
+    data = np.random.default_rng(1).random((3, 15, 20))
+    mp = MapPlot(title='test')
+    mp.add_variable('sst', lon, lat, data, plot_type='scatter')
+    mp.save_html(str(tmp_path / 'dash.html'), data_mode='sidecar')
+    data_dir = tmp_path / 'dash_data'
+    manifest = json.loads((data_dir / 'manifest.json').read_text())
+
+    descriptor = manifest['variables']['sst']['data']
+    assert descriptor['location'] == 'sidecar'
+    frames = [(data_dir / chunk).read_bytes() for chunk in descriptor['chunks']]
+    restored = np.stack([np.frombuffer(frame, dtype='<f4') for frame in frames]).reshape(data.shape)
+    np.testing.assert_array_equal(restored, data.astype(np.float32))
@@ -0,0 +1,51 @@
+"""
+Tests for grid cell lookup on rectilinear and curvilinear grids.
+"""
+
+import numpy as np
+
+from web_mapplot.spatial import GridIndex, KDTree, rectilinear_axes
+
+
+def test_rectilinear_axes_detection():
+    lon, lat = np.meshgrid(np.linspace(0, 10, 11), np.linspace(50, 40, 6))
+    axes = rectilinear_axes(lon, lat)
+    assert axes is not None
+    np.testing.assert_array_equal(axes[0], lon[0])
+    np.testing.assert_array_equal(axes[1], lat[:, 0])
+
+    assert rectilinear_axes(lon + 0.1 * lat, lat) is None
+
+
+def test_rectilinear_locate_picks_the_nearest_cell():
+    lon, lat = np.meshgrid(np.linspace(0, 10, 11), np.linspace(50, 40, 11))
+    index = GridIndex(lon, lat)
+    assert index.locate(47.2, 3.4) == (3, 3)
+    assert index.locate(40.1, 9.9) == (10, 10)
+    assert index.locate(60, 5) is None
+
+
+def test_curvilinear_locate_matches_brute_force():
+    j, i = np.meshgrid(np.arange(20.0), np.arange(15.0))
+    lon = 0.5 * j + 0.1 * i
+    lat = 40 + 0.5 * i - 0.05 * j
+    index = GridIndex(lon, lat)
+    assert index.tree is not None
+
+    rng = np.random.default_rng(1)
+    for q_lon, q_lat in zip(rng.uniform(1, 9, 30), rng.uniform(41, 46, 30)):
+        cell = index.locate(q_lat, q_lon)
+        scale = index.lon_scale
+        distance = np.hypot((lon - q_lon) * scale, lat - q_lat)
+        assert cell == np.unravel_index(np.argmin(distance), lon.shape)
+
+
+def test_kdtree_matches_brute_force():
+    rng = np.random.default_rng(0)
+    points = rng.random((500, 2))
+    tree = KDTree(points, leaf_size=8)
+    for query in rng.random((50, 2)):
+        squared, index = tree.query(tuple(query))
+        brute = ((points - query) ** 2).sum(axis=1)
+        assert index == int(np.argmin(brute))
+        assert np.isclose(squared, brute.min())
@@ -0,0 +1,57 @@
+"""
+Tests for per-frame statistics and color limit resolution.
+"""
+
+import numpy as np
+import pytest
+
+from web_mapplot.stats import frame_statistics, parse_percentile, resolve_limit
+
+
+def _frames():
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(4, 30, 40))
+    data[1, :5] = np.nan
+    data[3] = np.nan
+    return data
+
+
+def test_frame_statistics_match_numpy():
+    data = _frames()
+    stats = frame_statistics(data, bins=16)
+    with np.errstate(all='ignore'), pytest.warns(RuntimeWarning):
+        np.testing.assert_allclose(stats['min'], np.nanmin(data, axis=(1, 2)))
+    with np.errstate(all='ignore'), pytest.warns(RuntimeWarning):
+        np.testing.assert_allclose(stats['max'], np.nanmax(data, axis=(1, 2)))
+    with np.errstate(all='ignore'), pytest.warns(RuntimeWarning):
+        np.testing.assert_allclose(stats['mean'], np.nanmean(data, axis=(1, 2)))
+    np.testing.assert_array_equal(stats['count'], np.isfinite(data).sum(axis=(1, 2)))
+    np.testing.assert_array_equal(stats['histogram'].sum(axis=1), stats['count'])
+
+    t = 0
+    expected, _ = np.histogram(data[t], bins=16, range=(stats['min'][t], stats['max'][t]))
+    np.testing.assert_array_equal(stats['histogram'][t], expected)
+
+
+def test_constant_frame_lands_in_first_bin():
+    stats = frame_statistics(np.full((1, 3, 3), 2.5), bins=4)
+    assert stats['min'][0] == stats['max'][0] == 2.5
+    np.testing.assert_array_equal(stats['histogram'][0], [9, 0, 0, 0])
+
+
+def test_percentile_limits():
+    data = np.arange(1000, dtype=np.float64).reshape(1, 10, 100)
+    stats = frame_statistics(data, bins=1000)
+    assert resolve_limit('p50', stats, 'max') == pytest.approx(500, abs=2)
+    assert resolve_limit(None, stats, 'min') == 0
+    assert resolve_limit(None, stats, 'max') == 999
+    assert resolve_limit(3.5, stats, 'max') == 3.5
+
+
+def test_parse_percentile():
+    assert parse_percentile('p98.5') == 98.5
+    assert parse_percentile(12) is None
+    with pytest.raises(ValueError):
+        parse_percentile('p101')
+    with pytest.raises(ValueError):
+        parse_percentile('high')
@@ -0,0 +1,98 @@
+"""
+Tests for offline XYZ tile pyramids.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from web_mapplot import MapPlot
+from web_mapplot.raster import color_lut
+from web_mapplot.tiles import TILE_MANIFEST_NAME, TILE_SIZE, _downsample, export_pyramid, tile_bounds, tile_range
+
+
+def _tiles(root):
+    return sorted(path.relative_to(root).as_posix() for path in root.rglob('*.png'))
+
+
+def _grid(seed=0):
+    lon_axis = np.linspace(0, 20, 40)
+    lat_axis = np.linspace(30, 45, 30)
+    frame = np.random.default_rng(seed).random((30, 40))
+    return lon_axis, lat_axis, frame
+
+
+def test_tile_range_contains_the_tiles_of_a_point():
+    for z in range(0, 8):
+        x0, x1, y0, y1 = tile_range(z, (10.0, 40.0, 10.0, 40.0))
+        assert (x0, y0) == (x1, y1)
+        west, south, east, north = tile_bounds(z, x0, y0)
+        assert west <= 10.0 < east and south <= 40.0 < north
+
+
+def test_downsample_averages_children_ignoring_nan():
+    children = [np.full((TILE_SIZE, TILE_SIZE), value, dtype=np.float32) for value in (1, 2, 3, 4)]
+    children[3][:] = np.nan
+    parent = _downsample(children)
+    assert parent[0, 0] == 1 and parent[0, -1] == 2 and parent[-1, 0] == 3
+    assert np.isnan(parent[-1, -1])
+    assert np.isnan(_downsample([None, None, None, None])).all()
+
+
+def test_export_skips_unchanged_frames_and_rewrites_changed_ones(tmp_path):
+    lon_axis, lat_axis, frame = _grid()
+    lut = color_lut(['#000000', '#ffffff'])
+    written = export_pyramid(tmp_path, lon_axis, lat_axis, frame, (0, 4), lut, 0.0, 1.0)
+    tiles = _tiles(tmp_path)
+    assert written == len(tiles) > 0
+    assert json.loads((tmp_path / TILE_MANIFEST_NAME).read_text())['complete']
+
+    assert export_pyramid(tmp_path, lon_axis, lat_axis, frame, (0, 4), lut, 0.0, 1.0) == 0
+
+    # New color limits alone invalidate every tile
+    assert export_pyramid(tmp_path, lon_axis, lat_axis, frame, (0, 4), lut, 0.0, 2.0) == len(tiles)
+
+    # A smaller footprint leaves no stale tiles behind
+    export_pyramid(tmp_path, lon_axis[:10], lat_axis[:10], frame[:10, :10], (0, 4), lut, 0.0, 2.0)
+    assert set(_tiles(tmp_path)) < set(tiles)
+
+
+def test_interrupted_export_resumes(tmp_path):
+    lon_axis, lat_axis, frame = _grid()
+    lut = color_lut(['#000000', '#ffffff'])
+    export_pyramid(tmp_path, lon_axis, lat_axis, frame, (0, 4), lut, 0.0, 1.0)
+    manifest = json.loads((tmp_path / TILE_MANIFEST_NAME).read_text())
+    (tmp_path / TILE_MANIFEST_NAME).write_text(json.dumps(dict(manifest, complete=False)))
+    (tmp_path / _tiles(tmp_path)[-1]).unlink()
+    assert export_pyramid(tmp_path, lon_axis, lat_axis, frame, (0, 4), lut, 0.0, 1.0) == 1
+
+
+def test_export_tiles_page_omits_tiled_arrays(tmp_path, capsys):
+    lon, lat = np.meshgrid(np.linspace(0, 20, 40), np.linspace(30, 45, 30))
+    data = np.random.default_rng(0).random((2, 30, 40))
+    mp = MapPlot(title='tiles')
+    mp.add_variable('sst', lon, lat, data, plot_type='filled_contour')
+    mp.add_variable('heat', lon, lat, data, plot_type='heatmap')
+    mp.export_tiles(str(tmp_path), zoom_range=(0, 3), processes=1)
+
+    for name in ('sst', 'heat'):
+        assert (tmp_path / name / '1' / TILE_MANIFEST_NAME).exists()
+    html = (tmp_path / 'index.html').read_text()
+    assert 'mapplot-variable-' not in html
+    assert '"url": "sst/{t}/{z}/{x}/{y}.png"' in html
+
+    with pytest.raises(ValueError):
+        mp.export_tiles(str(tmp_path), zoom_range=(3, 1))
+
+
+@pytest.mark.parametrize('times', [[5], [-1], [0, 2]])
+def test_export_tiles_rejects_frames_outside_the_data(tmp_path, times):
+    lon, lat = np.meshgrid(np.linspace(0, 20, 40), np.linspace(30, 45, 30))
+    data = np.random.default_rng(0).random((2, 30, 40))
+    for plot_type in ('filled_contour', 'heatmap'):
+        mp = MapPlot(title='tiles')
+        mp.add_variable('sst', lon, lat, data, plot_type=plot_type)
+        with pytest.raises(ValueError):
+            mp.export_tiles(str(tmp_path), zoom_range=(0, 1), times=times, processes=1)
+    assert not any(tmp_path.iterdir())
@@ -0,0 +1,68 @@
+"""
+Tests for shared-arc filled contour topology.
+"""
+
+import numpy as np
+import pytest
+
+from web_mapplot.encoding import decode_geometry
+from web_mapplot.topology import contour_topology, filled_contour_topology, trace_rings
+
+
+def _bump(ny=40, nx=50, radius=10.0):
+    i, j = np.mgrid[0:ny, 0:nx]
+    return np.exp(-((i - ny / 2) ** 2 + (j - nx / 2) ** 2) / (2 * radius ** 2))
+
+
+def _rings(topology):
+    """Rebuild every level's rings as closed (n, 2) coordinate arrays from the shared arcs."""
+    arcs = decode_geometry(topology['arcs'])
+    levels = []
+    for rings in topology['levels']:
+        rebuilt = []
+        for ring in rings:
+            pieces = [arcs[ref] if ref >= 0 else arcs[~ref][::-1] for ref in ring]
+            for previous, current in zip(pieces, pieces[1:] + pieces[:1]):
+                np.testing.assert_allclose(previous[-1], current[0])
+            rebuilt.append(np.vstack(pieces))
+        levels.append(rebuilt)
+    return levels
+
+
+def _area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def test_trace_rings_closes_an_interior_ring():
+    rings = trace_rings(_bump(), 0.5)
+    assert len(rings) == 1
+    points, on_boundary = rings[0]
+    assert not on_boundary.any()
+
+
+def test_arcs_chain_into_closed_rings():
+    values = _bump()
+    values[:, :3] += 1.0
+    topology = contour_topology(values, np.linspace(0.05, 0.95, 6))
+    levels = _rings(topology)
+    assert len(levels) == 6
+    assert all(levels)
+
+
+def test_ring_area_matches_the_region_above_threshold():
+    radius = 10.0
+    topology = contour_topology(_bump(radius=radius), [0.5])
+    (ring,), = _rings(topology)
+    # exp(-r^2 / 2R^2) = 0.5 at r = R * sqrt(2 ln 2)
+    expected = np.pi * (radius * np.sqrt(2 * np.log(2))) ** 2
+    assert _area(ring) == pytest.approx(expected, rel=0.02)
+
+
+def test_filled_contour_topology_per_frame():
+    data = np.stack([_bump(), 2 * _bump()])
+    topology = filled_contour_topology(data, 0.0, 1.0, levels=4, frame_ranges=[(0, 1), (0, 2)])
+    assert len(topology['frames']) == 2
+    np.testing.assert_allclose(topology['frames'][1]['thresholds'], [0, 0.5, 1, 1.5])
+    with pytest.raises(ValueError):
+        filled_contour_topology(data, 0.0, 1.0, quantization=0)
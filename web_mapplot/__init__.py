@@ -3,6 +3,7 @@ Web MapPlot - A Python library for creating interactive web-based geographical v
 """
 
 from .mapplot import MapPlot
+from .chunkstore import publish, StorageBackend, LocalDirectoryBackend
 
 __version__ = '1.0.0'
-__all__ = ['MapPlot']
+__all__ = ['MapPlot', 'publish', 'StorageBackend', 'LocalDirectoryBackend']
@@ -0,0 +1,196 @@
+"""
+Persistent on-disk cache for encoded payloads, statistics and derived geometry.
+"""
+
+import hashlib
+import os
+import pickle
+import numpy as np
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Union
+
+
+# Arrays up to this size are hashed in full; larger ones are fingerprinted blockwise
+FULL_HASH_BYTES = 8 * 1024 * 1024
+
+# Number and size of evenly spaced blocks hashed for large arrays
+SAMPLE_BLOCKS = 256
+SAMPLE_BLOCK_BYTES = 4096
+
+# Part of every cache key; bump whenever the layout of a cached product or
+# the way it is computed changes (e.g. a raster entry becoming
+# ``{'bands': [...]}``) so entries written by older versions are never returned
+CACHE_VERSION = 3
+
+
+def fingerprint(array: Optional[np.ndarray]) -> str:
+    """
+    Cheap content fingerprint of an array.
+
+    Small arrays are hashed in full. Large arrays are hashed from evenly
+    spaced sample blocks combined with two vectorized folds (xor and
+    wrapping sum of 64-bit words) that touch every byte without copying,
+    so any changed value alters the fingerprint with high probability.
+
+    Args:
+        array: Array to fingerprint (None is allowed)
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if array is None:
+        digest.update(b'none')
+        return digest.hexdigest()
+
+    array = np.ascontiguousarray(array)
+    digest.update(repr((array.shape, array.dtype.str)).encode())
+    raw = array.reshape(-1).view(np.uint8)
+
+    if raw.size <= FULL_HASH_BYTES:
+        digest.update(raw.tobytes())
+        return digest.hexdigest()
+
+    starts = np.linspace(0, raw.size - SAMPLE_BLOCK_BYTES, SAMPLE_BLOCKS).astype(np.int64)
+    for start in starts:
+        digest.update(raw[start:start + SAMPLE_BLOCK_BYTES].tobytes())
+
+    words = raw[:raw.size - raw.size % 8].view(np.uint64)
+    digest.update(np.bitwise_xor.reduce(words).tobytes())
+    digest.update(np.add.reduce(words, dtype=np.uint64).tobytes())
+    digest.update(raw[words.size * 8:].tobytes())
+    return digest.hexdigest()
+
+
+class EncodeCache:
+    """
+    Size-bounded LRU cache of pickled values stored in a directory.
+
+    Entries are keyed by a hash of the input arrays' fingerprints and the
+    options used to derive them, so the cache can be shared by several
+    processes (e.g. successive cron runs) that build the same layers.
+    The directory size is scanned once and then tracked as entries are
+    written; eviction rescans only when that running total exceeds the
+    budget.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = 1024 ** 3):
+        """
+        Initialize EncodeCache.
+
+        Args:
+            directory: Cache directory (created if missing)
+            max_bytes: Total size above which least recently used entries are evicted
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = self._scan()[1]
+
+    @staticmethod
+    def make_key(kind: str, arrays: Iterable[Optional[np.ndarray]], **options) -> str:
+        """
+        Build a cache key from input arrays and the options that affect the result.
+
+        Args:
+            kind: Name of the derived product (e.g. 'delta', 'stats')
+            arrays: Input arrays
+            **options: Parameters that change the derived value
+
+        Returns:
+            Hex digest string
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f'v{CACHE_VERSION}:{kind}'.encode())
+        for array in arrays:
+            digest.update(fingerprint(array).encode())
+        digest.update(repr(sorted(options.items())).encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f'{key}.pkl'
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a cached value and mark it as recently used."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return default
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any):
+        """Store a value, then evict least recently used entries if over budget."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            self._total_bytes -= path.stat().st_size
+        except OSError:
+            pass
+        os.replace(tmp_path, path)
+        self._total_bytes += path.stat().st_size
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def get_or_compute(self, kind: str,
+                       arrays: Iterable[Optional[np.ndarray]],
+                       compute: Callable[[], Any],
+                       **options) -> Any:
+        """
+        Return the cached value for these inputs, computing and storing it on a miss.
+
+        Args:
+            kind: Name of the derived product
+            arrays: Input arrays
+            compute: Zero-argument callable producing the value
+            **options: Parameters that change the derived value
+
+        Returns:
+            Cached or freshly computed value
+        """
+        key = self.make_key(kind, arrays, **options)
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _scan(self):
+        """Return (mtime, size, path) of every entry and their total size."""
+        entries = []
+        total = 0
+        for path in self.directory.glob('*/*.pkl'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        return entries, total
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries, total = self._scan()
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+        self._total_bytes = total
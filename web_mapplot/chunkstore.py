@@ -0,0 +1,248 @@
+"""
+Content-addressed chunk storage and incremental publishing of sidecar exports.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Set, Union
+
+
+CHUNK_DIR = 'chunks'
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def chunk_key(raw: bytes, suffix: str = '.bin') -> str:
+    """
+    Return the content-addressed relative path for a chunk.
+
+    Args:
+        raw: Chunk bytes
+        suffix: File extension describing the chunk format
+
+    Returns:
+        Path of the form ``chunks/ab/abcdef...<suffix>``
+    """
+    digest = hashlib.sha256(raw).hexdigest()
+    return f'{CHUNK_DIR}/{digest[:2]}/{digest}{suffix}'
+
+
+def _atomic_write(path: Path, raw: bytes):
+    """Write bytes so that readers never observe a partially written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    tmp_path.write_bytes(raw)
+    os.replace(tmp_path, path)
+
+
+class ChunkStore:
+    """
+    Directory of immutable chunks named by the SHA-256 of their content.
+
+    Identical bytes always map to the same file, so re-exporting a
+    visualization only writes chunks whose content actually changed.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        """
+        Initialize ChunkStore.
+
+        Args:
+            root: Directory that holds the ``chunks/`` tree
+        """
+        self.root = Path(root)
+        self.written = 0
+        self.reused = 0
+
+    def put(self, raw: bytes, suffix: str = '.bin') -> str:
+        """
+        Store a chunk unless identical content already exists.
+
+        Args:
+            raw: Chunk bytes
+            suffix: File extension describing the chunk format
+
+        Returns:
+            Chunk path relative to the store root
+        """
+        key = chunk_key(raw, suffix)
+        path = self.root / key
+        if path.exists():
+            self.reused += 1
+        else:
+            _atomic_write(path, raw)
+            self.written += 1
+        return key
+
+
+class StorageBackend:
+    """
+    Publishing target for exported visualizations.
+
+    Subclass and implement ``exists`` and ``put`` to publish to an object
+    store (S3, GCS, ...), plus ``keys`` and ``delete`` so that chunks no
+    longer referenced can be pruned. Keys are '/'-separated paths relative
+    to the publish root.
+    """
+
+    def exists(self, key: str) -> bool:
+        """Return True if an object with this key is already published."""
+        raise NotImplementedError
+
+    def put(self, key: str, raw: bytes):
+        """Upload an object, replacing any existing one with the same key."""
+        raise NotImplementedError
+
+    def keys(self, prefix: str) -> Iterable[str]:
+        """Return the keys of all published objects starting with prefix."""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """Remove a published object."""
+        raise NotImplementedError
+
+
+class LocalDirectoryBackend(StorageBackend):
+    """Publish into a local (or mounted) directory."""
+
+    def __init__(self, root: Union[str, Path]):
+        """
+        Initialize LocalDirectoryBackend.
+
+        Args:
+            root: Target directory
+        """
+        self.root = Path(root)
+
+    def exists(self, key: str) -> bool:
+        return (self.root / key).exists()
+
+    def put(self, key: str, raw: bytes):
+        _atomic_write(self.root / key, raw)
+
+    def keys(self, prefix: str) -> Iterable[str]:
+        base = self.root / prefix.rstrip('/')
+        if not base.is_dir():
+            return []
+        return [
+            path.relative_to(self.root).as_posix()
+            for path in base.rglob('*')
+            if path.is_file() and not path.name.startswith('.')
+        ]
+
+    def delete(self, key: str):
+        path = self.root / key
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        # Drop the two-character fan-out directory once it is empty
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass
+
+
+def referenced_chunks(manifest: Dict) -> Set[str]:
+    """
+    Collect every chunk path referenced by a sidecar manifest.
+
+    Args:
+        manifest: Parsed manifest.json
+
+    Returns:
+        Set of chunk paths relative to the data directory
+    """
+    keys = set()
+    # Descriptors may be nested, e.g. raster frames grouped by zoom band
+    pending = list(manifest['variables'].values())
+    while pending:
+        value = pending.pop()
+        if isinstance(value, dict):
+            if value.get('location') == 'sidecar':
+                keys.update(value['chunks'])
+            else:
+                pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+    return keys
+
+
+def prune_chunks(backend: StorageBackend, prefix: str, keep: Set[str]) -> int:
+    """
+    Delete chunks under ``<prefix>chunks/`` that are not in keep.
+
+    Args:
+        backend: Storage holding the chunks
+        prefix: Key prefix of the data directory (e.g. 'dashboard_data/')
+        keep: Chunk paths, relative to the data directory, to retain
+
+    Returns:
+        Number of chunks deleted
+    """
+    deleted = 0
+    for key in list(backend.keys(f'{prefix}{CHUNK_DIR}/')):
+        if key[len(prefix):] not in keep:
+            backend.delete(key)
+            deleted += 1
+    return deleted
+
+
+def publish(filename: Union[str, Path],
+            target: Union[str, Path, StorageBackend],
+            prune: bool = True) -> Dict[str, int]:
+    """
+    Sync an exported visualization to a target, uploading only new chunks.
+
+    Only chunks referenced by the current manifest are considered, and since
+    content-addressed chunks are immutable any chunk already present on the
+    target is skipped. The manifest and the HTML shell are always uploaded,
+    and last, so that readers never see a manifest that references chunks
+    which have not arrived yet. Once everything is uploaded, chunks that
+    the new manifest no longer references are deleted from both the target
+    and the local data directory.
+
+    Args:
+        filename: HTML file written by MapPlot.save_html()
+        target: Target directory or StorageBackend instance
+        prune: Delete unreferenced chunks after publishing. Default: True.
+
+    Returns:
+        Dictionary with counts of 'uploaded', 'skipped' and 'pruned' chunks
+    """
+    html_path = Path(filename)
+    backend = target if isinstance(target, StorageBackend) else LocalDirectoryBackend(target)
+    data_dir = html_path.with_name(f'{html_path.stem}_data')
+
+    stats = {'uploaded': 0, 'skipped': 0, 'pruned': 0}
+    mutable = []
+    keep = None
+
+    manifest_path = data_dir / MANIFEST_NAME
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+        keep = referenced_chunks(manifest)
+        for chunk in sorted(keep):
+            key = f'{data_dir.name}/{chunk}'
+            if backend.exists(key):
+                stats['skipped'] += 1
+            else:
+                backend.put(key, (data_dir / chunk).read_bytes())
+                stats['uploaded'] += 1
+        mutable.append((f'{data_dir.name}/{MANIFEST_NAME}', manifest_path))
+
+    mutable.append((html_path.name, html_path))
+    for key, path in mutable:
+        backend.put(key, path.read_bytes())
+
+    if prune and keep is not None:
+        prefix = f'{data_dir.name}/'
+        stats['pruned'] = prune_chunks(backend, prefix, keep)
+        local = LocalDirectoryBackend(data_dir.parent)
+        if not (isinstance(backend, LocalDirectoryBackend)
+                and backend.root.resolve() == local.root.resolve()):
+            prune_chunks(local, prefix, keep)
+
+    return stats
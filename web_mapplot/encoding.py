@@ -0,0 +1,351 @@
+"""
+Binary encodings for shipping gridded arrays and geometry to the browser.
+"""
+
+import base64
+import zlib
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+
+# Quantized code reserved for missing (NaN) values
+NAN_CODE = int(np.iinfo(np.int32).min)
+
+# Number of quantization steps spanning the data range when no precision is given
+DEFAULT_QUANTIZATION_STEPS = 65534
+
+# Share of grid cells that must be missing in every frame before fields are
+# stored as their valid values plus a validity mask
+SPARSE_MISSING_FRACTION = 0.5
+
+
+def quantize(data: np.ndarray, scale: float, offset: float) -> np.ndarray:
+    """
+    Quantize floating point values to int32 codes.
+
+    Args:
+        data: Array of values (may contain NaN)
+        scale: Value represented by one quantization step
+        offset: Value represented by code 0
+
+    Returns:
+        int32 array of codes, with NaN mapped to NAN_CODE
+    """
+    data = np.asarray(data, dtype=np.float64)
+    valid = np.isfinite(data)
+    codes = np.full(data.shape, NAN_CODE, dtype=np.int32)
+    codes[valid] = np.rint((data[valid] - offset) / scale).astype(np.int32)
+    return codes
+
+
+def dequantize(codes: np.ndarray, scale: float, offset: float) -> np.ndarray:
+    """
+    Convert int32 codes produced by quantize() back to float values.
+
+    Args:
+        codes: int32 array of codes
+        scale: Value represented by one quantization step
+        offset: Value represented by code 0
+
+    Returns:
+        float64 array with NAN_CODE mapped back to NaN
+    """
+    values = offset + codes.astype(np.float64) * scale
+    values[codes == NAN_CODE] = np.nan
+    return values
+
+
+def _quantization_params(data: np.ndarray, precision: Optional[float],
+                         steps: int = DEFAULT_QUANTIZATION_STEPS):
+    """Pick (scale, offset) so that the data range fits comfortably in int32."""
+    finite = data[np.isfinite(data)]
+    if finite.size == 0:
+        return 1.0, 0.0
+    lo = float(finite.min())
+    hi = float(finite.max())
+    if precision is None:
+        precision = (hi - lo) / steps if hi > lo else 1.0
+    if precision <= 0:
+        raise ValueError("precision must be positive")
+    if (hi - lo) / precision >= 2 ** 30:
+        raise ValueError(f"precision {precision} is too fine for data range [{lo}, {hi}]")
+    return float(precision), lo
+
+
+def validity_mask(fields: Sequence[Optional[np.ndarray]]) -> Optional[np.ndarray]:
+    """
+    Find the grid cells that hold data in at least one frame of any field.
+
+    Args:
+        fields: (time, lat, lon) arrays on the same grid (None entries are skipped)
+
+    Returns:
+        Boolean (lat, lon) array, or None if fewer than SPARSE_MISSING_FRACTION
+        of the cells are missing, in which case masking would not pay off
+    """
+    valid = None
+    for field in fields:
+        if field is None:
+            continue
+        finite = np.isfinite(field).any(axis=0)
+        valid = finite if valid is None else valid | finite
+    if valid is None or 1 - valid.mean() < SPARSE_MISSING_FRACTION:
+        return None
+    return valid
+
+
+def encode_mask(valid: np.ndarray) -> Dict:
+    """
+    Encode a boolean (lat, lon) mask as a base64 bitmask.
+
+    Args:
+        valid: Boolean array, True for cells that hold data
+
+    Returns:
+        JSON-serializable payload with the 'shape', the number of valid cells
+        ('count') and the row-major bits, least significant bit first
+    """
+    bits = np.packbits(np.asarray(valid, dtype=bool).reshape(-1), bitorder='little')
+    return {
+        'encoding': 'bitmask',
+        'shape': list(valid.shape),
+        'count': int(np.count_nonzero(valid)),
+        'data': base64.b64encode(bits.tobytes()).decode('ascii')
+    }
+
+
+def decode_mask(payload: Dict) -> np.ndarray:
+    """Decode a payload produced by encode_mask() back to a boolean array."""
+    ny, nx = payload['shape']
+    bits = np.frombuffer(base64.b64decode(payload['data']), dtype=np.uint8)
+    return np.unpackbits(bits, count=ny * nx, bitorder='little').astype(bool).reshape(ny, nx)
+
+
+def encode_float32(data: np.ndarray, valid: Optional[np.ndarray] = None) -> Dict:
+    """
+    Encode a (time, lat, lon) array as one base64 float32 chunk per frame.
+
+    Args:
+        data: 3D array (time, lat, lon)
+        valid: Boolean (lat, lon) mask; only these cells are stored, in row-major order
+
+    Returns:
+        JSON-serializable payload dictionary
+    """
+    frames = data if valid is None else data[:, valid]
+    return {
+        'encoding': 'float32',
+        'shape': list(data.shape),
+        'chunks': [base64.b64encode(np.asarray(frame, dtype='<f4').tobytes()).decode('ascii')
+                   for frame in frames]
+    }
+
+
+def decode_float32(payload: Dict, valid: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Decode a payload produced by encode_float32().
+
+    Args:
+        payload: Payload dictionary
+        valid: The mask passed to encode_float32(), if any
+
+    Returns:
+        float32 array of shape payload['shape'], NaN outside the mask
+    """
+    values = np.stack([np.frombuffer(base64.b64decode(chunk), dtype='<f4') for chunk in payload['chunks']])
+    return _unmask(values, payload['shape'], valid)
+
+
+def _unmask(values: np.ndarray, shape: Sequence[int], valid: Optional[np.ndarray]) -> np.ndarray:
+    """Scatter (time, cells) values back onto the full grid."""
+    if valid is None:
+        return values.reshape(shape)
+    full = np.full(shape, np.nan, dtype=values.dtype)
+    full[:, valid] = values
+    return full
+
+
+def encode_delta(data: np.ndarray,
+                 keyframe_interval: int = 10,
+                 precision: Optional[float] = None,
+                 compression_level: int = 6,
+                 quantization_steps: int = DEFAULT_QUANTIZATION_STEPS,
+                 valid: Optional[np.ndarray] = None) -> Dict:
+    """
+    Encode a (time, lat, lon) array as keyframes plus quantized temporal deltas.
+
+    Frames are quantized to int32 codes and split into groups of
+    ``keyframe_interval`` frames. The first frame of each group is stored as
+    absolute codes, every following frame as the difference to its
+    predecessor. Each group is zlib-compressed on its own so the browser can
+    decode any time index by inflating a single group.
+
+    Args:
+        data: 3D array (time, lat, lon)
+        keyframe_interval: Number of frames per keyframe group
+        precision: Quantization step in data units (auto if None)
+        compression_level: zlib compression level (0-9)
+        quantization_steps: Steps spanning the data range when precision is None
+        valid: Boolean (lat, lon) mask; only these cells are stored, in row-major order
+
+    Returns:
+        JSON-serializable payload dictionary
+    """
+    if data.ndim != 3:
+        raise ValueError("delta encoding requires a 3D (time, lat, lon) array")
+    if keyframe_interval < 1:
+        raise ValueError("keyframe_interval must be at least 1")
+
+    scale, offset = _quantization_params(data, precision, quantization_steps)
+    codes = quantize(data if valid is None else data[:, valid], scale, offset)
+
+    chunks = []
+    for start in range(0, codes.shape[0], keyframe_interval):
+        group = codes[start:start + keyframe_interval]
+        deltas = group.copy()
+        # int32 arithmetic wraps, so NAN_CODE transitions round-trip exactly
+        deltas[1:] = group[1:] - group[:-1]
+        raw = deltas.astype('<i4').tobytes()
+        chunks.append(base64.b64encode(zlib.compress(raw, compression_level)).decode('ascii'))
+
+    return {
+        'encoding': 'delta',
+        'shape': list(data.shape),
+        'scale': scale,
+        'offset': offset,
+        'keyframe_interval': keyframe_interval,
+        'chunks': chunks
+    }
+
+
+def decode_delta(payload: Dict, valid: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Decode a payload produced by encode_delta().
+
+    Args:
+        payload: Payload dictionary
+        valid: The mask passed to encode_delta(), if any
+
+    Returns:
+        float64 array of shape payload['shape'], NaN outside the mask
+    """
+    ny, nx = payload['shape'][1:]
+    cells = ny * nx if valid is None else int(np.count_nonzero(valid))
+    groups = []
+    for chunk in payload['chunks']:
+        raw = zlib.decompress(base64.b64decode(chunk))
+        deltas = np.frombuffer(raw, dtype='<i4').reshape(-1, cells)
+        groups.append(np.cumsum(deltas, axis=0, dtype=np.int32))
+    codes = np.concatenate(groups, axis=0)
+    return _unmask(dequantize(codes, payload['scale'], payload['offset']), payload['shape'], valid)
+
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    """Map signed integers to unsigned ones with small magnitudes first (0, -1, 1, -2, ...)."""
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    return (values >> np.uint64(1)).astype(np.int64) ^ -(values & np.uint64(1)).astype(np.int64)
+
+
+def pack_varints(values: np.ndarray) -> bytes:
+    """
+    Pack unsigned integers as LEB128 varints: 7 bits per byte, high bit set on all but the last byte.
+
+    Args:
+        values: 1D array of non-negative integers
+
+    Returns:
+        Packed bytes
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = np.ones(values.size, dtype=np.int64)
+    for k in range(1, 10):
+        lengths += values >= np.uint64(1) << np.uint64(7 * k)
+    owner = np.repeat(np.arange(values.size), lengths)
+    position = np.arange(owner.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    payload = (values[owner] >> (np.uint64(7) * position.astype(np.uint64))) & np.uint64(0x7F)
+    more = (position < lengths[owner] - 1).astype(np.uint64) << np.uint64(7)
+    return (payload | more).astype(np.uint8).tobytes()
+
+
+def unpack_varints(data: bytes) -> np.ndarray:
+    """
+    Unpack bytes produced by pack_varints().
+
+    Args:
+        data: Packed bytes
+
+    Returns:
+        uint64 array of values
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size == 0:
+        return np.zeros(0, dtype=np.uint64)
+    last = raw < 0x80
+    starts = np.concatenate([[0], np.flatnonzero(last)[:-1] + 1])
+    owner = np.cumsum(np.concatenate([[0], last[:-1]]))
+    position = np.arange(raw.size) - starts[owner]
+    shifted = (raw & 0x7F).astype(np.uint64) << (np.uint64(7) * position.astype(np.uint64))
+    return np.add.reduceat(shifted, starts)
+
+
+def encode_geometry(parts: Sequence[np.ndarray], precision: float, dimensions: int = 2) -> Dict:
+    """
+    Encode polylines or rings as quantized, zigzag-delta, varint-packed binary.
+
+    Coordinates are quantized to multiples of ``precision``. Each part is
+    written as its point count followed by the zigzag-encoded difference of
+    every coordinate to the same coordinate of the previous point (the first
+    point is relative to zero), all as varints. Nearby points cost one or two
+    bytes per coordinate instead of a JSON number each.
+
+    Args:
+        parts: Sequence of (n, dimensions) coordinate arrays
+        precision: Quantization step in coordinate units
+        dimensions: Coordinates per point
+
+    Returns:
+        JSON-serializable payload dictionary
+    """
+    if precision <= 0:
+        raise ValueError("precision must be positive")
+    stream = []
+    for part in parts:
+        codes = np.rint(np.asarray(part, dtype=np.float64).reshape(-1, dimensions) / precision).astype(np.int64)
+        deltas = np.diff(codes, axis=0, prepend=np.zeros((1, dimensions), dtype=np.int64))
+        stream.append(np.array([len(codes)], dtype=np.uint64))
+        stream.append(_zigzag(deltas.reshape(-1)))
+    packed = pack_varints(np.concatenate(stream)) if stream else b''
+    return {
+        'encoding': 'varint',
+        'precision': float(precision),
+        'dimensions': dimensions,
+        'parts': len(parts),
+        'data': base64.b64encode(packed).decode('ascii')
+    }
+
+
+def decode_geometry(payload: Dict) -> List[np.ndarray]:
+    """
+    Decode a payload produced by encode_geometry().
+
+    Args:
+        payload: Payload dictionary
+
+    Returns:
+        List of (n, dimensions) float64 coordinate arrays
+    """
+    values = unpack_varints(base64.b64decode(payload['data']))
+    dimensions = payload['dimensions']
+    parts = []
+    position = 0
+    for _ in range(payload['parts']):
+        count = int(values[position])
+        deltas = _unzigzag(values[position + 1:position + 1 + count * dimensions])
+        position += 1 + count * dimensions
+        codes = np.cumsum(deltas.reshape(count, dimensions), axis=0)
+        parts.append(codes * payload['precision'])
+    return parts
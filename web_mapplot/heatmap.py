@@ -0,0 +1,289 @@
+"""
+Kernel density heatmaps rendered to image overlays.
+"""
+
+import base64
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .raster import HEATMAP_STOPS, LUT_SIZE, WGS84_ECCENTRICITY, color_lut, encode_png, projection_y
+
+
+# Minimum map zoom of each precomputed resolution band
+DEFAULT_ZOOM_BANDS = (0, 4, 7, 10)
+
+# Largest raster edge in pixels
+MAX_RASTER_SIZE = 2048
+
+# Densities below this fraction of the peak are fully transparent
+MIN_ALPHA_DENSITY = 1.0 / 255
+
+
+def default_bandwidth(lon: np.ndarray, lat: np.ndarray) -> float:
+    """
+    Pick a kernel bandwidth of about two average point spacings.
+
+    Args:
+        lon: Point longitudes
+        lat: Point latitudes
+
+    Returns:
+        Bandwidth in degrees
+    """
+    valid = np.isfinite(lon) & np.isfinite(lat)
+    count = int(valid.sum())
+    if count < 2:
+        return 1.0
+    width = np.ptp(lon[valid])
+    height = np.ptp(lat[valid])
+    area = width * height if width > 0 and height > 0 else max(width, height) ** 2
+    return float(2 * np.sqrt(area / count)) or 1.0
+
+
+def _blur_axis(image: np.ndarray, sigma: float, axis: int) -> np.ndarray:
+    """Convolve along one axis with a Gaussian of sigma pixels, via zero-padded FFT."""
+    if sigma <= 0:
+        return image
+    radius = int(np.ceil(3 * sigma))
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    kernel /= kernel.sum()
+
+    n = image.shape[axis]
+    size = n + 2 * radius
+    shape = [1] * image.ndim
+    shape[axis] = -1
+    spectrum = np.fft.rfft(image, n=size, axis=axis) * np.fft.rfft(kernel, n=size).reshape(shape)
+    full = np.fft.irfft(spectrum, n=size, axis=axis)
+    # Output m of the linear convolution is centred on input m - radius
+    return np.take(full, np.arange(radius, radius + n), axis=axis)
+
+
+def gaussian_blur(image: np.ndarray, sigma_x: float, sigma_y: float) -> np.ndarray:
+    """
+    Separable Gaussian blur (rows then columns).
+
+    Args:
+        image: 2D array
+        sigma_x: Kernel width along columns, in pixels
+        sigma_y: Kernel width along rows, in pixels
+
+    Returns:
+        Blurred array of the same shape, clipped at zero
+    """
+    blurred = _blur_axis(_blur_axis(image, sigma_x, axis=1), sigma_y, axis=0)
+    return np.maximum(blurred, 0, out=blurred)
+
+
+def _mercator_lat(y: float) -> float:
+    return float(np.rad2deg(2 * np.arctan(np.exp(y)) - np.pi / 2))
+
+
+def _world_mercator_lat(y: float) -> float:
+    """Inverse of raster.world_mercator_y, by fixed-point iteration on the ellipsoid."""
+    e = WGS84_ECCENTRICITY
+    ts = np.exp(-y)
+    lat = np.pi / 2 - 2 * np.arctan(ts)
+    for _ in range(15):
+        e_sin = e * np.sin(lat)
+        lat = np.pi / 2 - 2 * np.arctan(ts * ((1 - e_sin) / (1 + e_sin)) ** (e / 2))
+    return float(np.rad2deg(lat))
+
+
+class _KernelDensity:
+    """Weighted points in projected map coordinates and the Gaussian kernel that spreads them."""
+
+    def __init__(self, lon, lat, data, vmin, vmax, bandwidth, projection):
+        lon = np.asarray(lon, dtype=np.float64).reshape(-1)
+        lat = np.asarray(lat, dtype=np.float64).reshape(-1)
+        values = np.asarray(data, dtype=np.float64).reshape(data.shape[0], -1)
+        valid = np.isfinite(lon) & np.isfinite(lat)
+        lon, lat, values = lon[valid], lat[valid], values[:, valid]
+        if lon.size == 0:
+            raise ValueError("heatmap needs at least one point with valid coordinates")
+
+        if bandwidth is None:
+            bandwidth = default_bandwidth(lon, lat)
+        if bandwidth <= 0:
+            raise ValueError("bandwidth must be positive")
+
+        # Projected coordinates in which Leaflet stretches the overlay linearly
+        self.transform = projection_y(projection)
+        if self.transform is not None:
+            self.x_scale = np.pi / 180
+            xs = lon * self.x_scale
+            ys = self.transform(lat)
+            self.world = 2 * np.pi
+            center = np.deg2rad(np.clip(np.median(lat), -85, 85))
+            self.sigma_x = bandwidth * self.x_scale
+            self.sigma_y = bandwidth * self.x_scale / np.cos(center)
+            self.inverse = _world_mercator_lat if projection == 'EPSG3395' else _mercator_lat
+        else:
+            xs, ys = lon, lat
+            self.x_scale = 1.0
+            self.world = 360.0
+            self.sigma_x = self.sigma_y = bandwidth
+            self.inverse = float
+
+        self.xs, self.ys = xs, ys
+        self.x0, self.x1 = xs.min() - 3 * self.sigma_x, xs.max() + 3 * self.sigma_x
+        self.y0, self.y1 = ys.min() - 3 * self.sigma_y, ys.max() + 3 * self.sigma_y
+
+        span = vmax - vmin if vmax > vmin else 1.0
+        self.weights = np.nan_to_num(np.clip((values - vmin) / span, 0, 1), nan=0.0)
+        self.num_frames = values.shape[0]
+
+    def layout(self, screen_zoom: int, max_size: int) -> Tuple[float, int, int]:
+        """Pixel size, width and height of a raster matching screen pixels at a zoom."""
+        pixel = max(self.world / (256 * 2 ** screen_zoom),
+                    min(self.sigma_x, self.sigma_y) / 2,
+                    max(self.x1 - self.x0, self.y1 - self.y0) / max_size)
+        width = max(1, int(np.ceil((self.x1 - self.x0) / pixel)))
+        height = max(1, int(np.ceil((self.y1 - self.y0) / pixel)))
+        return pixel, width, height
+
+    def frames(self, pixel: float, width: int, height: int,
+               times: Optional[Iterable[int]] = None) -> Iterator[np.ndarray]:
+        """
+        Densities of frames on a raster, divided by the peak over all frames.
+
+        Two passes keep memory at one frame: the first finds the peak over
+        every frame, the second yields only the frames in times (all if None),
+        in ascending order. Row 0 is the northern edge.
+        """
+        cols = np.clip(((self.xs - self.x0) / pixel).astype(np.intp), 0, width - 1)
+        rows = np.clip(((self.y1 - self.ys) / pixel).astype(np.intp), 0, height - 1)
+        cells = rows * width + cols
+
+        def density(t):
+            grid = np.bincount(cells, weights=self.weights[t], minlength=width * height)
+            return gaussian_blur(grid.reshape(height, width), self.sigma_x / pixel, self.sigma_y / pixel)
+
+        peak = max(float(density(t).max()) for t in range(self.num_frames)) or 1.0
+        for t in (range(self.num_frames) if times is None else sorted(set(times))):
+            yield np.minimum(density(t) / peak, 1.0)
+
+    def axes(self, pixel: float, width: int, height: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Longitudes of the raster's column centres and latitudes of its row centres."""
+        lons = (self.x0 + (np.arange(width) + 0.5) * pixel) / self.x_scale
+        lats = np.array([self.inverse(self.y1 - (i + 0.5) * pixel) for i in range(height)])
+        return lons, lats
+
+    def bounds(self, pixel: float, width: int, height: int) -> List[List[float]]:
+        """Raster bounds as [[south, west], [north, east]]."""
+        south = self.y1 - height * pixel
+        east = self.x0 + width * pixel
+        return [[self.inverse(south), float(self.x0 / self.x_scale)],
+                [self.inverse(self.y1), float(east / self.x_scale)]]
+
+
+def kde_heatmap(lon: np.ndarray,
+                lat: np.ndarray,
+                data: np.ndarray,
+                vmin: float,
+                vmax: float,
+                bandwidth: Optional[float] = None,
+                zoom_bands: Sequence[int] = DEFAULT_ZOOM_BANDS,
+                projection: str = 'EPSG3857',
+                max_size: int = MAX_RASTER_SIZE) -> Dict:
+    """
+    Render a kernel density heatmap for every frame and zoom band.
+
+    Points are weighted by their value normalized to [vmin, vmax] and binned
+    onto a raster laid out in projected coordinates, which is then blurred
+    with a separable Gaussian of ``bandwidth`` degrees. Each zoom band gets
+    a raster sized to roughly match screen pixels at that zoom (never finer
+    than half a kernel width). Densities are divided by the peak over all
+    frames of the band, so colors and opacity are comparable across frames.
+
+    Args:
+        lon: Longitudes of the points (any shape)
+        lat: Latitudes of the points (same shape as lon)
+        data: Array (time, ...) of point values matching lon/lat
+        vmin: Value mapped to zero weight
+        vmax: Value mapped to full weight
+        bandwidth: Kernel standard deviation in degrees (auto if None)
+        zoom_bands: Minimum map zoom of each resolution band, ascending
+        projection: Map projection (see MapPlot)
+        max_size: Largest raster edge in pixels
+
+    Returns:
+        Dictionary with 'bands', each holding 'min_zoom', 'bounds'
+        ([[south, west], [north, east]]) and 'frames' (PNG data URLs)
+    """
+    kernel = _KernelDensity(lon, lat, data, vmin, vmax, bandwidth, projection)
+    lut = color_lut(HEATMAP_STOPS)
+
+    bands = []
+    last_shape = None
+    for k, min_zoom in enumerate(zoom_bands):
+        screen_zoom = zoom_bands[k + 1] - 1 if k + 1 < len(zoom_bands) else min_zoom
+        raster = kernel.layout(screen_zoom, max_size)
+        if raster[1:] == last_shape:
+            continue
+        last_shape = raster[1:]
+
+        frames = []
+        for normalized in kernel.frames(*raster):
+            rgba = colorize_density(normalized, lut)
+            frames.append('data:image/png;base64,' + base64.b64encode(encode_png(rgba)).decode('ascii'))
+        bands.append({'min_zoom': int(min_zoom), 'bounds': kernel.bounds(*raster), 'frames': frames})
+
+    return {'bands': bands}
+
+
+def colorize_density(normalized: np.ndarray, lut: np.ndarray) -> np.ndarray:
+    """
+    Color normalized densities with opacity rising with density, like leaflet.heat.
+
+    Args:
+        normalized: 2D array of densities in [0, 1] (NaN is transparent)
+        lut: Color table from raster.color_lut()
+
+    Returns:
+        uint8 RGBA array of shape normalized.shape + (4,)
+    """
+    valid = np.isfinite(normalized)
+    normalized = np.where(valid, np.clip(normalized, 0, 1), 0)
+    rgba = np.zeros(normalized.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = lut[np.round(normalized * (LUT_SIZE - 1)).astype(np.intp)]
+    rgba[..., 3] = np.where(normalized >= MIN_ALPHA_DENSITY, np.round(normalized * 255), 0)
+    return rgba
+
+
+def kde_surface(lon: np.ndarray,
+                lat: np.ndarray,
+                data: np.ndarray,
+                vmin: float,
+                vmax: float,
+                zoom: int,
+                bandwidth: Optional[float] = None,
+                times: Optional[Iterable[int]] = None,
+                max_size: int = MAX_RASTER_SIZE) -> Tuple[np.ndarray, np.ndarray, Iterator[np.ndarray]]:
+    """
+    Kernel density of every frame on a Web Mercator raster, for tiling.
+
+    Uses the same weights, kernel and peak normalization as kde_heatmap(),
+    so tiles match the overlay the page would draw.
+
+    Args:
+        lon: Longitudes of the points (any shape)
+        lat: Latitudes of the points (same shape as lon)
+        data: Array (time, ...) of point values matching lon/lat
+        vmin: Value mapped to zero weight
+        vmax: Value mapped to full weight
+        zoom: Deepest zoom the raster should resolve
+        bandwidth: Kernel standard deviation in degrees (auto if None)
+        times: Frame indices to yield (default: all). The peak is still taken
+            over every frame, so tiles of a subset match a full export.
+        max_size: Largest raster edge in pixels
+
+    Returns:
+        Tuple of (longitude axis, latitude axis from north to south, iterator
+        over the selected frames, in ascending order, of normalized density
+        in [0, 1])
+    """
+    kernel = _KernelDensity(lon, lat, data, vmin, vmax, bandwidth, 'EPSG3857')
+    raster = kernel.layout(zoom, max_size)
+    lon_axis, lat_axis = kernel.axes(*raster)
+    return lon_axis, lat_axis, kernel.frames(*raster, times=times)
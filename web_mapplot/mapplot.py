@@ -4,11 +4,34 @@ Main MapPlot class for creating interactive geographical visualizations.
 
 import json
 import numpy as np
-from typing import Union, List, Dict, Optional, Tuple
+from typing import Union, List, Dict, Optional, Sequence, Tuple
 from datetime import datetime
 import base64
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from .cache import EncodeCache, fingerprint
+from .chunkstore import LocalDirectoryBackend, prune_chunks, referenced_chunks
+from .encoding import DEFAULT_QUANTIZATION_STEPS, encode_delta, encode_float32, encode_mask, validity_mask
+from .heatmap import kde_heatmap, kde_surface
+from .planner import DEFAULT_CONNECTION_MBPS, current_settings, format_plan, plan_output
+from .preview import build_preview
+from .raster import COLORMAP_STOPS, HEATMAP_STOPS, cell_edges, color_lut, render_raster
+from .regrid import Regridder, regular_grid
+from .sidecar import FRAME_FIELDS, GRID_FIELDS, write_sidecar
+from .spatial import GridIndex, rectilinear_axes
+from .stats import DEFAULT_BINS, frame_statistics, parse_percentile, resolve_limit
+from .tiles import default_processes, export_pyramid, tile_index
+from .topology import filled_contour_topology
+
+# Variable fields the page keeps as unparsed text until the variable is first shown
+DEFERRED_FIELDS = GRID_FIELDS + FRAME_FIELDS + ('raster', 'topology')
+
+
+def _script_json(value) -> str:
+    """JSON for embedding in a script element; '</' is escaped so strings cannot close it."""
+    return json.dumps(value).replace('</', '<\\/')
+
 
 class MapPlot:
     """
@@ -30,7 +53,9 @@ class MapPlot:
                  zoom: int = 4,
                  auto_refresh: Optional[int] = None,
                  projection: str = "EPSG3857",
-                 interpolate_frames: bool = False):
+                 interpolate_frames: bool = False,
+                 cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = 1024 ** 3):
         """
         Initialize MapPlot instance.
 
@@ -47,8 +72,16 @@ class MapPlot:
                        - 'EPSG3395': World Mercator projection
                        - 'Simple': Simple CRS for non-geographic maps
             interpolate_frames: Enable smooth interpolation between animation frames.
-                              When True, data values are blended during transitions for
-                              fluid animations. Default: False.
+                              When True, playback advances on every display frame:
+                              scatter, hexbin, voronoi and vector layers are recolored
+                              from blended values, raster layers crossfade and other
+                              layers change at whole frames. Default: False.
+            cache_dir: Directory for a persistent encode cache (None to disable).
+                      Encoded payloads and statistics are keyed by a fingerprint of the
+                      input arrays and options, so static layers rebuilt by later
+                      processes reuse earlier results instead of re-encoding.
+            cache_max_bytes: Size limit of the encode cache; least recently used
+                            entries are evicted beyond it. Default: 1 GiB.
         """
         self.title = title
         self.center = center
@@ -57,6 +90,12 @@ class MapPlot:
         self.projection = projection
         self.interpolate_frames = interpolate_frames
         self.variables = {}
+        self._arrays = {}
+        self._grid_indexes = {}
+        self._time_major = {}
+        self._regridders = {}
+        self._masks = {}
+        self._cache = EncodeCache(cache_dir, cache_max_bytes) if cache_dir else None
 
     def add_variable(self,
                      name: str,
@@ -69,10 +108,19 @@ class MapPlot:
                      v_component: Optional[np.ndarray] = None,
                      colormap: str = 'viridis',
                      levels: int = 10,
-                     vmin: Optional[float] = None,
-                     vmax: Optional[float] = None,
+                     vmin: Optional[Union[float, str]] = None,
+                     vmax: Optional[Union[float, str]] = None,
                      vector_scale: float = 1.0,
-                     units: str = ''):
+                     units: str = '',
+                     encoding: str = 'raw',
+                     keyframe_interval: int = 10,
+                     precision: Optional[float] = None,
+                     dynamic_range: bool = False,
+                     max_points: int = 900,
+                     render: str = 'shapes',
+                     bandwidth: Optional[float] = None,
+                     regrid: Optional[Union[str, Regridder]] = None,
+                     regrid_resolution: Optional[float] = None):
         """
         Add a variable to the visualization.
 
@@ -88,15 +136,65 @@ class MapPlot:
             v_component: V (northward) component for vector/stream fields (same shape as data)
             colormap: Color scheme ('viridis', 'plasma', 'jet', 'rainbow', 'cool', 'hot')
             levels: Number of contour levels
-            vmin: Minimum value for color scale (auto if None)
-            vmax: Maximum value for color scale (auto if None)
+            vmin: Minimum value for color scale (auto if None). A percentile string
+                  such as 'p2' selects a robust limit estimated from histograms.
+            vmax: Maximum value for color scale (auto if None, percentile strings
+                  such as 'p98' allowed)
             vector_scale: Scale factor for vector/stream arrows (default: 1.0)
             units: Units for the variable
+            encoding: How gridded fields are serialized:
+                     - 'raw': Nested JSON lists (default)
+                     - 'delta': Keyframe every ``keyframe_interval`` frames plus quantized
+                       temporal deltas, zlib-compressed. Best for slowly evolving time-series.
+                     When at least half of the grid cells are missing in every frame (land
+                     or ocean masks, radar sweeps, swaths), only the valid cells are stored,
+                     plus a validity bitmask shared by all frames and by every variable with
+                     the same mask; 'raw' fields are then stored as float32.
+            keyframe_interval: Frames per keyframe group for 'delta' encoding (default: 10)
+            precision: Quantization step in data units for 'delta' encoding
+                      (auto if None, ~1/65534 of the data range)
+            dynamic_range: Rescale colors to each frame's own range (or per-frame
+                          percentiles) instead of one range for the whole series
+            max_points: Point budget for 'voronoi' plots; the grid is subsampled evenly
+                       to at most this many cells (default: 900)
+            render: How 'filled_contour' and 'heatmap' plots are drawn:
+                   - 'shapes': Polygons/heat points built in the browser (default)
+                   - 'raster': Rendered here to one PNG per frame and shown as an image
+                     overlay. Filled contours are colormapped (rectilinear grids only);
+                     heatmaps are kernel density estimates with one image per zoom
+                     band, normalized over all frames. Best for large grids.
+                   - 'topology': Filled contours only. Contour bands are traced here and
+                     shipped as shared arcs (every boundary between two bands stored
+                     once, quantized and delta-encoded); the browser draws each band
+                     without contouring or stacking polygons.
+            bandwidth: Kernel width in degrees for raster heatmaps (auto if None)
+            regrid: Resample a curvilinear grid onto a regular lon/lat grid before
+                   anything else, so raster, tile and lookup paths can use it:
+                   - 'bilinear': Interpolate inside the source cell of each target point
+                   - 'conservative': Area-weighted average of overlapping source cells
+                     (for targets coarser than the source)
+                   - A Regridder instance with a custom target grid
+                   Weights are computed once per source grid and reused for every
+                   frame, field and later variable on the same grid.
+            regrid_resolution: Target spacing in degrees for 'bilinear'/'conservative'
+                              (auto if None, the median source node spacing)
         """
 
         # Validate inputs
+        if max_points < 1:
+            raise ValueError("max_points must be at least 1")
+        if render not in ('shapes', 'raster', 'topology'):
+            raise ValueError(f"Unknown render '{render}', expected 'shapes', 'raster' or 'topology'")
+        if render == 'raster' and plot_type not in ('filled_contour', 'heatmap'):
+            raise ValueError("render='raster' is only supported for 'filled_contour' and 'heatmap' plots")
+        if render == 'topology' and plot_type != 'filled_contour':
+            raise ValueError("render='topology' is only supported for 'filled_contour' plots")
+        if encoding not in ('raw', 'delta'):
+            raise ValueError(f"Unknown encoding '{encoding}', expected 'raw' or 'delta'")
         if lon.shape != lat.shape:
             raise ValueError("lon and lat must have the same shape")
+        if isinstance(regrid, str) and regrid not in ('bilinear', 'conservative'):
+            raise ValueError(f"Unknown regrid '{regrid}', expected 'bilinear' or 'conservative'")
 
         # Handle vector fields - validate before dimension conversion
         if plot_type in ['vector', 'stream']:
@@ -131,74 +229,595 @@ class MapPlot:
         if len(timestamps) != data.shape[0]:
             raise ValueError("Number of timestamps must match first dimension of data")
 
-        # Calculate value range
-        if vmin is None:
-            vmin = float(np.nanmin(data))
-        if vmax is None:
-            vmax = float(np.nanmax(data))
+        if regrid is not None:
+            regridder = regrid if isinstance(regrid, Regridder) else \
+                self._regridder(lon, lat, regrid, regrid_resolution)
+            if regridder.source_shape != lon.shape:
+                raise ValueError("Regridder source grid does not match lon/lat shape")
+            data = regridder(data)
+            if u_component is not None:
+                u_component = regridder(u_component)
+            if v_component is not None:
+                v_component = regridder(v_component)
+            lon, lat = regridder.target_mesh()
+
+        # Calculate value range from one fused statistics pass per frame,
+        # rejecting malformed percentile limits before doing the work
+        for limit in (vmin, vmax):
+            parse_percentile(limit)
+        stats = self._cached('stats', [data], lambda: frame_statistics(data), bins=DEFAULT_BINS)
+        frame_stats = {
+            'min': stats['min'].tolist(),
+            'max': stats['max'].tolist(),
+            'mean': stats['mean'].tolist(),
+            'count': stats['count'].tolist()
+        }
+        if dynamic_range:
+            frame_stats['vmin'] = [resolve_limit(vmin, stats, 'min', [t]) for t in range(data.shape[0])]
+            frame_stats['vmax'] = [resolve_limit(vmax, stats, 'max', [t]) for t in range(data.shape[0])]
+        vmin = resolve_limit(vmin, stats, 'min')
+        vmax = resolve_limit(vmax, stats, 'max')
+
+        raster = None
+        if render == 'raster' and plot_type == 'heatmap':
+            raster = self._cached(
+                'kde', [lon, lat, data],
+                lambda: kde_heatmap(lon, lat, data, vmin, vmax, bandwidth=bandwidth,
+                                    projection=self.projection),
+                vmin=vmin, vmax=vmax, bandwidth=bandwidth, projection=self.projection)
+        elif render == 'raster':
+            frame_ranges = list(zip(frame_stats['vmin'], frame_stats['vmax'])) if dynamic_range else None
+            raster = self._cached(
+                'raster', [lon, lat, data],
+                lambda: render_raster(lon, lat, data, colormap, vmin, vmax, levels=levels,
+                                      frame_ranges=frame_ranges, projection=self.projection),
+                colormap=colormap, vmin=vmin, vmax=vmax, levels=levels,
+                frame_ranges=frame_ranges, projection=self.projection)
+
+        topology = None
+        if render == 'topology':
+            topology = self._topology(data, vmin, vmax, levels, frame_stats if dynamic_range else None)
+
+        valid = self._cached('mask', [data, u_component, v_component],
+                             lambda: validity_mask([data, u_component, v_component]))
+        mask = self._register_mask(valid)
 
         # Store variable data
         self.variables[name] = {
             'lon': lon.tolist(),
             'lat': lat.tolist(),
-            'data': data.tolist(),
+            'data': self._encode_field(data, encoding, keyframe_interval, precision, mask=mask),
             'plot_type': plot_type,
             'timestamps': [ts.isoformat() for ts in timestamps],
-            'u_component': u_component.tolist() if u_component is not None else None,
-            'v_component': v_component.tolist() if v_component is not None else None,
+            'u_component': self._encode_field(u_component, encoding, keyframe_interval, precision, mask=mask),
+            'v_component': self._encode_field(v_component, encoding, keyframe_interval, precision, mask=mask),
             'colormap': colormap,
             'levels': levels,
             'vmin': vmin,
             'vmax': vmax,
+            'dynamic_range': dynamic_range,
+            'frame_stats': frame_stats,
             'vector_scale': vector_scale,
+            'max_points': max_points,
+            'bandwidth': bandwidth,
+            'rectilinear': rectilinear_axes(lon, lat) is not None,
+            'raster': raster,
+            'topology': topology,
             'units': units,
             'shape': list(data.shape)
         }
 
+        # Drop lookup structures built for a previous variable with this name
+        self._grid_indexes.pop(name, None)
+        for field in ('data', 'u_component', 'v_component'):
+            self._time_major.pop((name, field), None)
+
+        self._arrays[name] = {
+            'lon': lon,
+            'lat': lat,
+            'data': data,
+            'u_component': u_component,
+            'v_component': v_component,
+            'mask': valid
+        }
+
         # Auto-calculate center if not set
         if self.center is None:
             self.center = (float(np.nanmean(lat)), float(np.nanmean(lon)))
 
-    def _generate_html(self) -> str:
-        """Generate standalone HTML file content."""
+    def timeseries(self, name: str, lat: float, lon: float,
+                   field: str = 'data', time_major: bool = True) -> Optional[Dict]:
+        """
+        Extract the full time series of a variable at one location.
 
-        # Read template
-        template_path = Path(__file__).parent / 'templates' / 'map_template.html'
-        with open(template_path, 'r', encoding='utf-8') as f:
-            template = f.read()
+        The grid cell is found through a GridIndex built once per variable
+        (bisection on rectilinear axes, KD-tree otherwise).
 
-        # Prepare data
-        data_json = json.dumps({
+        Args:
+            name: Variable name
+            lat: Latitude of the location
+            lon: Longitude of the location
+            field: 'data', 'u_component' or 'v_component'
+            time_major: Read from a (lat, lon, time) copy of the field, built on
+                       first use, so each series is one contiguous read instead
+                       of a strided gather across every frame. Doubles the
+                       memory held for the field.
+
+        Returns:
+            Dictionary with the grid cell ('i', 'j'), its coordinates, the
+            timestamps and the values (NaN as None), or None if the location
+            lies outside the grid
+        """
+        if name not in self._arrays:
+            raise KeyError(f"Unknown variable '{name}'")
+        arrays = self._arrays[name]
+        if arrays.get(field) is None:
+            raise ValueError(f"Variable '{name}' has no field '{field}'")
+
+        if name not in self._grid_indexes:
+            self._grid_indexes[name] = GridIndex(arrays['lon'], arrays['lat'])
+        cell = self._grid_indexes[name].locate(lat, lon)
+        if cell is None:
+            return None
+        i, j = cell
+
+        if time_major:
+            key = (name, field)
+            if key not in self._time_major:
+                self._time_major[key] = np.ascontiguousarray(np.moveaxis(arrays[field], 0, -1))
+            series = self._time_major[key][i, j]
+        else:
+            series = arrays[field][:, i, j]
+
+        return {
+            'variable': name,
+            'field': field,
+            'i': i,
+            'j': j,
+            'lat': float(arrays['lat'][i, j]),
+            'lon': float(arrays['lon'][i, j]),
+            'units': self.variables[name]['units'],
+            'timestamps': self.variables[name]['timestamps'],
+            'values': [None if np.isnan(v) else float(v) for v in series]
+        }
+
+    def subset(self, name: str,
+               bbox: Optional[Tuple[float, float, float, float]] = None,
+               stride: int = 1,
+               t: Optional[int] = None,
+               field: str = 'data') -> Optional[Dict]:
+        """
+        Cut a spatial window out of a variable by index arithmetic.
+
+        Args:
+            name: Variable name
+            bbox: (west, south, east, north) in degrees (full domain if None)
+            stride: Keep every stride-th row and column of the window
+            t: Time index (all frames if None); ignored for 'lon' and 'lat'
+            field: 'data', 'u_component', 'v_component', 'lon' or 'lat'
+
+        Returns:
+            Dictionary with the float32 'values' array and the 'rows' and 'cols'
+            (start, stop) index ranges of the window, or None if no grid point
+            lies inside bbox
+        """
+        if name not in self._arrays:
+            raise KeyError(f"Unknown variable '{name}'")
+        if stride < 1:
+            raise ValueError("stride must be at least 1")
+        arrays = self._arrays[name]
+        if field not in FRAME_FIELDS + GRID_FIELDS or arrays[field] is None:
+            raise ValueError(f"Variable '{name}' has no field '{field}'")
+
+        array = arrays[field]
+        if field not in ('lon', 'lat'):
+            if t is not None:
+                if not -array.shape[0] <= t < array.shape[0]:
+                    raise ValueError(f"Time index {t} out of range for {array.shape[0]} frames")
+                array = array[t]
+        ny, nx = array.shape[-2:]
+
+        if bbox is None:
+            rows, cols = slice(0, ny), slice(0, nx)
+        else:
+            if name not in self._grid_indexes:
+                self._grid_indexes[name] = GridIndex(arrays['lon'], arrays['lat'])
+            window = self._grid_indexes[name].window(*bbox)
+            if window is None:
+                return None
+            rows, cols = window
+
+        values = array[..., rows.start:rows.stop:stride, cols.start:cols.stop:stride]
+        return {
+            'values': np.ascontiguousarray(values, dtype='<f4'),
+            'rows': (rows.start, rows.stop),
+            'cols': (cols.start, cols.stop)
+        }
+
+    def _topology(self, data: np.ndarray, vmin: float, vmax: float, levels: int,
+                  frame_stats: Optional[Dict] = None) -> Dict:
+        """Shared-arc filled contour topology of every frame (per-frame ranges from frame_stats if given)."""
+        frame_ranges = list(zip(frame_stats['vmin'], frame_stats['vmax'])) if frame_stats else None
+        return self._cached(
+            'topology', [data],
+            lambda: filled_contour_topology(data, vmin, vmax, levels=levels, frame_ranges=frame_ranges),
+            vmin=vmin, vmax=vmax, levels=levels, frame_ranges=frame_ranges)
+
+    def _regridder(self, lon: np.ndarray, lat: np.ndarray,
+                   method: str, resolution: Optional[float]) -> Regridder:
+        """Regridder for a source grid, built once per grid, method and resolution."""
+        key = (fingerprint(lon), fingerprint(lat), method, resolution)
+        if key not in self._regridders:
+            def build():
+                target_lon, target_lat = regular_grid(lon, lat, resolution)
+                return Regridder(lon, lat, target_lon, target_lat, method=method)
+            self._regridders[key] = self._cached('regrid', [lon, lat], build,
+                                                 method=method, resolution=resolution)
+        return self._regridders[key]
+
+    def _cached(self, kind: str, arrays: List[Optional[np.ndarray]], compute, **options):
+        """Run compute(), going through the encode cache when one is configured."""
+        if self._cache is None:
+            return compute()
+        return self._cache.get_or_compute(kind, arrays, compute, **options)
+
+    def _register_mask(self, valid: Optional[np.ndarray]) -> Optional[str]:
+        """Keep one copy of each distinct validity mask and return its key."""
+        if valid is None:
+            return None
+        key = fingerprint(valid)[:16]
+        self._masks.setdefault(key, valid)
+        return key
+
+    def _encode_field(self,
+                      array: Optional[np.ndarray],
+                      encoding: str,
+                      keyframe_interval: int,
+                      precision: Optional[float],
+                      quantization_steps: int = DEFAULT_QUANTIZATION_STEPS,
+                      mask: Optional[str] = None):
+        """Serialize a (time, lat, lon) field for the HTML payload, storing only cells inside mask."""
+        if array is None:
+            return None
+        valid = self._masks[mask] if mask is not None else None
+        if encoding == 'delta':
+            encoded = self._cached(
+                'delta', [array, valid],
+                lambda: encode_delta(array, keyframe_interval=keyframe_interval, precision=precision,
+                                     quantization_steps=quantization_steps, valid=valid),
+                keyframe_interval=keyframe_interval, precision=precision,
+                quantization_steps=quantization_steps)
+        elif valid is not None:
+            encoded = self._cached('float32', [array, valid], lambda: encode_float32(array, valid))
+        else:
+            return array.tolist()
+        return dict(encoded, mask=mask) if mask is not None else encoded
+
+    def _payload_masks(self, variables: Dict) -> Dict:
+        """Encoded validity masks referenced by the fields of the given variables."""
+        keys = {variable[field]['mask'] for variable in variables.values() for field in FRAME_FIELDS
+                if isinstance(variable.get(field), dict) and variable[field].get('mask')}
+        return {key: encode_mask(self._masks[key]) for key in sorted(keys)}
+
+    def _build_payload(self) -> Dict:
+        """Collect everything the page needs into a JSON-serializable dictionary."""
+        return {
             'title': self.title,
             'center': self.center,
             'zoom': self.zoom,
             'auto_refresh': self.auto_refresh,
             'projection': self.projection,
             'interpolate_frames': self.interpolate_frames,
+            'masks': self._payload_masks(self.variables),
             'variables': self.variables
-        })
+        }
+
+    def plan_output(self,
+                    max_bytes: Optional[int] = None,
+                    load_seconds: Optional[float] = None,
+                    connection_mbps: float = DEFAULT_CONNECTION_MBPS,
+                    data_mode: str = 'auto') -> Dict:
+        """
+        Plan how to fit the page into a size or load-time budget.
+
+        Encoded sizes are estimated from samples of each field, then the
+        planner switches to delta encoding, moves data to a sidecar directory
+        (data_mode='auto' only), coarsens quantization and finally thins
+        frames and decimates the grid (down to a floor) until the estimate
+        fits. A budget below the size of the page without data is reported
+        as infeasible with the settings unchanged. Nothing is modified; pass
+        the same budget to save_html() to apply the plan.
+
+        Args:
+            max_bytes: Budget in bytes for the page (or, with sidecar data, for
+                      everything fetched before the first frame is shown)
+            load_seconds: Alternative budget: target load time at connection_mbps
+            connection_mbps: Assumed connection throughput in Mbit/s (default: 10)
+            data_mode: 'inline', 'sidecar', or 'auto' to let the planner choose
+
+        Returns:
+            Report with the chosen 'data_mode', the estimated size and load time,
+            whether it 'fits', the 'steps' taken and per-variable settings
+            ('encoding', 'precision', 'quantization_steps', 'frame_step', 'stride',
+            'shape', 'bytes')
+        """
+        if max_bytes is None and load_seconds is None:
+            raise ValueError("plan_output needs max_bytes or load_seconds")
+        if load_seconds is not None:
+            seconds_budget = load_seconds * connection_mbps * 1e6 / 8
+            max_bytes = seconds_budget if max_bytes is None else min(max_bytes, seconds_budget)
+
+        shell = self._build_payload()
+        preview = build_preview(shell, self._arrays)
+        shell['variables'] = {}
+        shell_bytes = len(self._generate_html(shell).encode('utf-8')) + len(json.dumps(preview))
+        return plan_output(self.variables, self._arrays, max_bytes, data_mode=data_mode,
+                           shell_bytes=shell_bytes, connection_mbps=connection_mbps)
+
+    def _planned_variables(self, plan: Dict) -> Tuple[Dict, Dict]:
+        """Re-encode variables with the settings chosen by plan_output()."""
+        variables, arrays = {}, {}
+        for name, variable in self.variables.items():
+            choice = plan['variables'][name]
+            if all(choice[key] == value for key, value in current_settings(variable).items()):
+                variables[name], arrays[name] = variable, self._arrays[name]
+                continue
+            step, stride = choice['frame_step'], choice['stride']
+            source = self._arrays[name]
+            subset = {
+                field: None if array is None else
+                array[::stride, ::stride] if field in ('lon', 'lat', 'mask') else array[::step, ::stride, ::stride]
+                for field, array in source.items()
+            }
+
+            variable = dict(variable)
+            if step > 1 or stride > 1:
+                variable['lon'] = subset['lon'].tolist()
+                variable['lat'] = subset['lat'].tolist()
+                variable['timestamps'] = variable['timestamps'][::step]
+                variable['frame_stats'] = {key: values[::step] for key, values in variable['frame_stats'].items()}
+                variable['shape'] = list(subset['data'].shape)
+                if variable.get('raster') is not None:
+                    variable['raster'] = {'bands': [dict(band, frames=band['frames'][::step])
+                                                    for band in variable['raster']['bands']]}
+                if variable.get('topology') is not None:
+                    variable['topology'] = self._topology(
+                        subset['data'], variable['vmin'], variable['vmax'], variable['levels'],
+                        variable['frame_stats'] if variable['dynamic_range'] else None)
+            mask = self._register_mask(subset['mask'])
+            for field in ('data', 'u_component', 'v_component'):
+                variable[field] = self._encode_field(subset[field], choice['encoding'], choice['keyframe_interval'],
+                                                     choice['precision'], choice['quantization_steps'], mask=mask)
+
+            variables[name] = variable
+            arrays[name] = subset
+        return variables, arrays
+
+    @staticmethod
+    def _defer_fields(payload: Dict) -> Tuple[Dict, str]:
+        """
+        Move every variable's arrays into an inert script element of its own.
+
+        Args:
+            payload: Page payload
+
+        Returns:
+            (payload whose variables name their element in 'deferred', HTML of the elements)
+        """
+        variables = {}
+        scripts = []
+        for index, (name, variable) in enumerate(payload['variables'].items()):
+            fields = {key: variable[key] for key in DEFERRED_FIELDS if variable.get(key) is not None}
+            if not fields:
+                variables[name] = variable
+                continue
+            element_id = f'mapplot-variable-{index}'
+            variables[name] = {key: value for key, value in variable.items() if key not in fields}
+            variables[name]['deferred'] = element_id
+            scripts.append(f'<script type="text/plain" id="{element_id}">{_script_json(fields)}</script>')
+        return dict(payload, variables=variables), '\n    '.join(scripts)
+
+    def _generate_html(self, payload: Optional[Dict] = None) -> str:
+        """Generate standalone HTML file content."""
+
+        # Read template
+        template_path = Path(__file__).parent / 'templates' / 'map_template.html'
+        with open(template_path, 'r', encoding='utf-8') as f:
+            template = f.read()
+
+        # Prepare data
+        if payload is None:
+            payload = self._build_payload()
+        preview = build_preview(payload, self._arrays)
+        payload, variable_scripts = self._defer_fields(payload)
 
         # Replace placeholders
-        html = template.replace('{{DATA_JSON}}', data_json)
+        html = template.replace('{{PREVIEW_JSON}}', _script_json(preview))
+        html = html.replace('{{VARIABLE_SCRIPTS}}', variable_scripts)
+        html = html.replace('{{DATA_JSON}}', _script_json(payload))
         html = html.replace('{{TITLE}}', self.title)
 
         return html
 
-    def save_html(self, filename: str = 'map_visualization.html'):
+    def save_html(self, filename: str = 'map_visualization.html', data_mode: str = 'inline',
+                  max_bytes: Optional[int] = None, load_seconds: Optional[float] = None,
+                  connection_mbps: float = DEFAULT_CONNECTION_MBPS):
         """
         Save visualization as standalone HTML file.
 
         Args:
             filename: Output filename
+            data_mode: Where variable arrays are stored:
+                      - 'inline': Embedded in the HTML file (default)
+                      - 'sidecar': Written as per-variable, per-frame binary chunks plus a
+                        manifest into a ``<name>_data`` directory next to the HTML file.
+                        The page opens immediately and fetches chunks lazily, so it must
+                        be served over HTTP rather than opened from disk. Chunks are
+                        named by a hash of their content, so re-exports only write
+                        what changed (see web_mapplot.publish).
+                      - 'auto': Inline, unless a budget is given and the planner
+                        needs sidecar data to meet it
+            max_bytes: Size budget; variables are re-encoded, thinned and decimated as
+                      chosen by plan_output() until the output fits, and the plan is
+                      printed. The variables added to this MapPlot are not changed.
+            load_seconds: Alternative budget: target load time at connection_mbps
+            connection_mbps: Assumed connection throughput in Mbit/s (default: 10)
         """
-        html = self._generate_html()
+        if data_mode not in ('inline', 'sidecar', 'auto'):
+            raise ValueError(f"Unknown data_mode '{data_mode}', expected 'inline', 'sidecar' or 'auto'")
 
         output_path = Path(filename)
+        payload = self._build_payload()
+        arrays = self._arrays
+
+        if max_bytes is not None or load_seconds is not None:
+            plan = self.plan_output(max_bytes, load_seconds, connection_mbps, data_mode)
+            print(format_plan(plan))
+            payload['variables'], arrays = self._planned_variables(plan)
+            payload['masks'] = self._payload_masks(payload['variables'])
+            data_mode = plan['data_mode']
+        elif data_mode == 'auto':
+            data_mode = 'inline'
+
+        if data_mode == 'sidecar':
+            data_dir = output_path.with_name(f'{output_path.stem}_data')
+            payload, store = write_sidecar(payload, arrays, data_dir)
+            payload['sidecar'] = f'{data_dir.name}/'
+            print(f"Wrote {store.written} new data chunks ({store.reused} unchanged) "
+                  f"to {data_dir.absolute()}")
+
+        html = self._generate_html(payload)
         output_path.write_text(html, encoding='utf-8')
         print(f"Saved visualization to {output_path.absolute()}")
 
+        if data_mode == 'sidecar':
+            # The new page is live, so chunks only the previous export used can go
+            prune_chunks(LocalDirectoryBackend(data_dir.parent), f'{data_dir.name}/',
+                         referenced_chunks(payload))
+
         return str(output_path.absolute())
 
+    def export_tiles(self,
+                     out_dir: str,
+                     zoom_range: Tuple[int, int] = (0, 8),
+                     variables: Optional[Sequence[str]] = None,
+                     times: Optional[Sequence[int]] = None,
+                     processes: Optional[int] = None,
+                     html: Optional[str] = 'index.html') -> str:
+        """
+        Pre-render variables into static XYZ tile pyramids.
+
+        Tiles are written to ``<out_dir>/<variable>/<t>/{z}/{x}/{y}.png`` in Web
+        Mercator. The deepest zoom is sampled from the grid and every coarser
+        level is averaged from its four children; subtrees are rendered in
+        parallel by a process pool. Empty tiles are skipped. Each frame is
+        fingerprinted (data, grid, color limits and colormap): unchanged
+        frames are not re-rendered, an interrupted export resumes when run
+        again, and frames whose inputs changed are rewritten from scratch.
+        When using several processes on macOS or Windows, call this from
+        under ``if __name__ == '__main__':``.
+
+        Args:
+            out_dir: Output directory
+            zoom_range: (min_zoom, max_zoom) to render, inclusive
+            variables: Variables to tile (default: all 'filled_contour' and 'heatmap'
+                      variables). Heatmaps are tiled from their kernel density
+                      surface; every other variable needs a rectilinear grid.
+            times: Frame indices to tile, each in range(number of frames) (default: all)
+            processes: Worker processes (default: one per CPU core; 1 renders inline)
+            html: File name of a page written into out_dir that shows the tiled
+                 variables as tile layers loaded from relative URLs (None to skip).
+                 Tiled variables are embedded without their arrays.
+
+        Returns:
+            Absolute path of the output directory
+        """
+        min_zoom, max_zoom = zoom_range
+        if not 0 <= min_zoom <= max_zoom:
+            raise ValueError("zoom_range must be (min_zoom, max_zoom) with 0 <= min_zoom <= max_zoom")
+        if variables is None:
+            variables = [name for name, variable in self.variables.items()
+                         if variable['plot_type'] in ('filled_contour', 'heatmap')]
+
+        jobs = []
+        for name in variables:
+            if name not in self.variables:
+                raise ValueError(f"Unknown variable '{name}'")
+            num_frames = self._arrays[name]['data'].shape[0]
+            selected = set(range(num_frames) if times is None else times)
+            invalid = sorted(t for t in selected if t not in range(num_frames))
+            if invalid:
+                raise ValueError(f"Frame indices {invalid} are outside variable '{name}', "
+                                 f"which has {num_frames} frame(s)")
+            if self.variables[name]['plot_type'] == 'heatmap':
+                # Heatmaps are tiled from their density surface, which is built from points
+                jobs.append((name, None, selected))
+                continue
+            axes = rectilinear_axes(self._arrays[name]['lon'], self._arrays[name]['lat'])
+            if axes is None:
+                raise ValueError(f"Variable '{name}' is not on a rectilinear grid and cannot be tiled")
+            jobs.append((name, axes, selected))
+
+        out_path = Path(out_dir)
+        processes = processes or default_processes()
+        executor = ProcessPoolExecutor(processes) if processes > 1 else None
+        written = 0
+        tiled = {}
+        try:
+            for name, axes, selected in jobs:
+                variable = self.variables[name]
+                arrays = self._arrays[name]
+                data = arrays['data']
+
+                if variable['plot_type'] == 'heatmap':
+                    # Same kernel density surface as the raster overlay, resolved for the deepest zoom
+                    lon_axis, lat_axis, densities = kde_surface(
+                        arrays['lon'], arrays['lat'], data, variable['vmin'], variable['vmax'],
+                        max_zoom, bandwidth=variable['bandwidth'], times=selected)
+                    lut = color_lut(HEATMAP_STOPS)
+                    for t, density in zip(sorted(selected), densities):
+                        written += export_pyramid(out_path / name / str(t), lon_axis, lat_axis, density,
+                                                  zoom_range, lut, 0.0, 1.0, density=True,
+                                                  executor=executor, workers=processes)
+                else:
+                    lon_axis, lat_axis = axes
+                    stops = COLORMAP_STOPS.get(variable['colormap'], COLORMAP_STOPS['YlOrRd'])
+                    lut = color_lut(stops)
+                    levels = variable['levels'] if variable['plot_type'] == 'filled_contour' else None
+                    frame_stats = variable['frame_stats']
+                    for t in sorted(selected):
+                        if variable['dynamic_range']:
+                            vmin, vmax = frame_stats['vmin'][t], frame_stats['vmax'][t]
+                        else:
+                            vmin, vmax = variable['vmin'], variable['vmax']
+                        written += export_pyramid(out_path / name / str(t), lon_axis, lat_axis, data[t],
+                                                  zoom_range, lut, vmin, vmax, levels=levels,
+                                                  executor=executor, workers=processes)
+
+                lon_edges = cell_edges(np.sort(lon_axis))
+                lat_edges = cell_edges(np.sort(lat_axis))
+                tiled[name] = tile_index(name, zoom_range,
+                                         (lon_edges[0], lat_edges[0], lon_edges[-1], lat_edges[-1]))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        print(f"Wrote {written} tiles to {out_path.absolute()}")
+
+        if html is not None:
+            payload = self._build_payload()
+            # Tiled layers are drawn from the pyramid alone, so their arrays stay out of the page
+            payload['variables'] = {
+                name: dict({key: value for key, value in variable.items() if key not in DEFERRED_FIELDS},
+                           tiles=tiled[name]) if name in tiled else variable
+                for name, variable in payload['variables'].items()
+            }
+            payload['masks'] = self._payload_masks(payload['variables'])
+            (out_path / html).write_text(self._generate_html(payload), encoding='utf-8')
+            print(f"Saved tiled visualization to {(out_path / html).absolute()}")
+
+        return str(out_path.absolute())
+
     def show(self, port: int = 5000, debug: bool = False):
         """
         Launch web server to display visualization.
@@ -0,0 +1,310 @@
+"""
+Output size planning: fit a page into a byte budget by choosing encodings,
+sidecar placement, frame thinning and spatial decimation.
+
+Sizes are estimated rather than produced: JSON lists are priced by
+serializing a sample of values, delta encodings by compressing one keyframe
+group of a central window, and raster frames by their actual encoded size.
+"""
+
+import base64
+import json
+import math
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from .encoding import DEFAULT_QUANTIZATION_STEPS, encode_delta
+from .sidecar import FRAME_FIELDS
+
+# Assumed throughput of a typical connection, used to turn load times into bytes
+DEFAULT_CONNECTION_MBPS = 10.0
+
+# Quantization steps across each field's range for the coarse-precision step;
+# still finer than any color scale can show
+COARSE_QUANTIZATION_STEPS = 4096
+
+# Keyframe interval used when the planner switches a raw field to delta encoding
+DEFAULT_KEYFRAME_INTERVAL = 10
+
+# Values serialized or compressed to price one field
+SAMPLE_VALUES = 4096
+SAMPLE_WINDOW = 96
+
+# Largest spatial stride the planner will use
+MAX_STRIDE = 16
+
+# Frame thinning never leaves fewer frames than this (or than the series has)
+MIN_FRAMES = 4
+
+
+def _json_bytes_per_value(array: np.ndarray) -> float:
+    """Average length of a value in a JSON list, from an even sample of the array."""
+    flat = array.reshape(-1)
+    sample = flat[::max(1, flat.size // SAMPLE_VALUES)][:SAMPLE_VALUES]
+    return len(json.dumps(sample.tolist())) / max(sample.size, 1)
+
+
+def _delta_bytes_per_value(field: np.ndarray, settings: Dict, valid: Optional[np.ndarray] = None) -> float:
+    """Compressed bytes per stored value of one keyframe group, measured on a central window."""
+    stride = settings['stride']
+    frames = field[::settings['frame_step'], ::stride, ::stride]
+    group = frames[:settings['keyframe_interval']]
+    ny, nx = group.shape[1:]
+    i0 = max(0, (ny - SAMPLE_WINDOW) // 2)
+    j0 = max(0, (nx - SAMPLE_WINDOW) // 2)
+    window = np.asarray(group[:, i0:i0 + SAMPLE_WINDOW, j0:j0 + SAMPLE_WINDOW], dtype=np.float64)
+    if valid is not None:
+        valid = valid[::stride, ::stride][i0:i0 + SAMPLE_WINDOW, j0:j0 + SAMPLE_WINDOW]
+    encoded = encode_delta(window, keyframe_interval=window.shape[0], precision=settings['precision'],
+                           quantization_steps=settings['quantization_steps'], valid=valid)
+    binary = sum(len(base64.b64decode(chunk)) for chunk in encoded['chunks'])
+    stored = window.shape[0] * (window[0].size if valid is None else np.count_nonzero(valid))
+    return binary / max(stored, 1)
+
+
+def _thinner_step(frame_step: int, num_frames: int) -> Optional[int]:
+    """Next frame step when thinning, or None once that would drop below MIN_FRAMES frames."""
+    step = min(frame_step * 2, num_frames)
+    if step == frame_step or math.ceil(num_frames / step) < min(MIN_FRAMES, num_frames):
+        return None
+    return step
+
+
+def _reduced_shape(shape: Tuple[int, ...], settings: Dict) -> Tuple[int, int, int]:
+    frames, ny, nx = shape
+    step, stride = settings['frame_step'], settings['stride']
+    return math.ceil(frames / step), math.ceil(ny / stride), math.ceil(nx / stride)
+
+
+def estimate_variable(variable: Dict, arrays: Dict[str, np.ndarray], settings: Dict) -> Dict[str, float]:
+    """
+    Estimate the encoded size of one variable under planner settings.
+
+    Args:
+        variable: Variable entry of the page payload
+        arrays: The variable's numpy arrays keyed by field name
+        settings: Dictionary with 'encoding', 'precision', 'quantization_steps',
+                 'keyframe_interval', 'frame_step' and 'stride'
+
+    Returns:
+        Dictionary with 'inline' (bytes embedded in the page), 'sidecar'
+        (bytes of all sidecar chunks), 'first_view' (sidecar bytes fetched to
+        show the first frame) and 'metadata' (JSON kept in the page either way)
+    """
+    frames, ny, nx = _reduced_shape(arrays['data'].shape, settings)
+    step = settings['frame_step']
+    stride = settings['stride']
+    valid = arrays.get('mask')
+    # Masked fields store only their valid cells, as float32 unless delta-encoded
+    cells = ny * nx if valid is None else int(np.count_nonzero(valid[::stride, ::stride]))
+
+    metadata = len(json.dumps(variable['timestamps'][::step])) + \
+        len(json.dumps({key: values[::step] for key, values in variable['frame_stats'].items()}))
+
+    inline = sidecar = first_view = 0.0
+    grid_json = _json_bytes_per_value(arrays['lon']) + _json_bytes_per_value(arrays['lat'])
+    inline += grid_json * ny * nx
+    sidecar += 2 * 4 * ny * nx
+    first_view += 2 * 4 * ny * nx
+
+    if valid is not None:
+        metadata += math.ceil(ny * nx / 8) * 4 / 3
+
+    for field in FRAME_FIELDS:
+        array = arrays.get(field)
+        if array is None:
+            continue
+        values = frames * cells
+        if settings['encoding'] == 'delta':
+            per_value = _delta_bytes_per_value(array, settings, valid)
+            inline += per_value * values * 4 / 3
+            sidecar += per_value * values
+            first_view += per_value * min(frames, settings['keyframe_interval']) * cells
+        else:
+            inline += (_json_bytes_per_value(array) if valid is None else 4 * 4 / 3) * values
+            sidecar += 4 * values
+            first_view += 4 * cells
+
+    topology = variable.get('topology')
+    if topology is not None:
+        # Topology stays in the page in either mode; arc lengths scale with
+        # the grid's edge length, not its area
+        metadata += sum(len(json.dumps(frame)) for frame in topology['frames'][::step]) / settings['stride']
+
+    raster = variable.get('raster')
+    if raster is not None:
+        for band in raster['bands']:
+            urls = band['frames'][::step]
+            inline += sum(len(url) for url in urls)
+            sidecar += sum(len(url) for url in urls) * 3 / 4
+            first_view += len(urls[0]) * 3 / 4 if urls else 0
+
+    return {'inline': inline, 'sidecar': sidecar, 'first_view': first_view, 'metadata': float(metadata)}
+
+
+def current_settings(variable: Dict) -> Dict:
+    """Planner settings that reproduce a variable as it was added."""
+    encoded = variable['data']
+    delta = isinstance(encoded, dict) and encoded.get('encoding') == 'delta'
+    return {
+        'encoding': 'delta' if delta else 'raw',
+        'precision': encoded['scale'] if delta else None,
+        'quantization_steps': DEFAULT_QUANTIZATION_STEPS,
+        'keyframe_interval': encoded['keyframe_interval'] if delta else DEFAULT_KEYFRAME_INTERVAL,
+        'frame_step': 1,
+        'stride': 1
+    }
+
+
+def plan_output(variables: Dict[str, Dict],
+                arrays: Dict[str, Dict[str, np.ndarray]],
+                max_bytes: float,
+                data_mode: str = 'auto',
+                shell_bytes: int = 0,
+                connection_mbps: float = DEFAULT_CONNECTION_MBPS) -> Dict:
+    """
+    Choose per-variable settings so the page fits a byte budget.
+
+    Steps are tried from least to most lossy, each applied to every variable,
+    until the estimate fits:
+
+    1. Delta encoding for fields stored as JSON lists
+    2. Sidecar placement (only with data_mode='auto'); the budget then applies
+       to the first view: the page plus the grid and first frame group of the
+       largest variable, since other chunks are fetched on demand
+    3. Coarse quantization (1/4096 of each field's range)
+    4. Frame thinning and spatial decimation, alternated so time and space
+       lose resolution at a similar rate, down to MIN_FRAMES frames and a
+       stride of MAX_STRIDE. Nothing is decimated if even that floor would
+       not fit.
+
+    The page without variable data is measured first: if it alone reaches
+    the budget no step can help, and the current settings are returned as
+    an infeasible plan.
+
+    Args:
+        variables: Payload variable entries keyed by name
+        arrays: Per-variable numpy arrays keyed by field name
+        max_bytes: Budget in bytes
+        data_mode: 'inline', 'sidecar', or 'auto' to let the planner choose
+        shell_bytes: Size of the page without variable data
+        connection_mbps: Throughput used to report the estimated load time
+
+    Returns:
+        Report with the chosen 'data_mode', 'estimated_bytes',
+        'estimated_seconds', 'fits', the 'fixed_bytes' of the page without
+        variable data, the 'steps' taken and per-variable 'variables'
+        settings and sizes
+    """
+    if data_mode not in ('inline', 'sidecar', 'auto'):
+        raise ValueError(f"Unknown data_mode '{data_mode}', expected 'inline', 'sidecar' or 'auto'")
+    if max_bytes <= 0:
+        raise ValueError("max_bytes must be positive")
+
+    settings = {name: current_settings(variable) for name, variable in variables.items()}
+    mode = 'sidecar' if data_mode == 'sidecar' else 'inline'
+    steps: List[str] = []
+
+    def measure():
+        sizes = {name: estimate_variable(variables[name], arrays[name], settings[name]) for name in variables}
+        metadata = sum(size['metadata'] for size in sizes.values())
+        if mode == 'inline':
+            total = shell_bytes + metadata + sum(size['inline'] for size in sizes.values())
+        else:
+            largest = max((size['first_view'] for size in sizes.values()), default=0.0)
+            total = shell_bytes + metadata + largest
+        return total, sizes
+
+    total, sizes = measure()
+    feasible = shell_bytes < max_bytes
+
+    if total > max_bytes and feasible and any(s['encoding'] == 'raw' for s in settings.values()):
+        for s in settings.values():
+            s['encoding'] = 'delta'
+        steps.append('delta encoding')
+        total, sizes = measure()
+
+    if total > max_bytes and feasible and data_mode == 'auto':
+        mode = 'sidecar'
+        steps.append('sidecar placement')
+        total, sizes = measure()
+
+    if total > max_bytes and feasible:
+        for s in settings.values():
+            s['precision'] = None
+            s['quantization_steps'] = COARSE_QUANTIZATION_STEPS
+        steps.append(f'coarse precision (1/{COARSE_QUANTIZATION_STEPS} of range)')
+        total, sizes = measure()
+
+    if total > max_bytes and feasible:
+        # Check the most reduced settings first, so data is never thrown away without fitting
+        chosen = settings
+        settings = {name: dict(s) for name, s in chosen.items()}
+        for name, s in settings.items():
+            num_frames, ny, nx = arrays[name]['data'].shape
+            while _thinner_step(s['frame_step'], num_frames) is not None:
+                s['frame_step'] = _thinner_step(s['frame_step'], num_frames)
+            s['stride'] = max(s['stride'], min(MAX_STRIDE, max(ny, nx)))
+        floor_total, _ = measure()
+        settings = chosen
+        if floor_total > max_bytes:
+            feasible = False
+            steps.append('no decimation: the budget is not met even at the decimation floor')
+
+    while total > max_bytes and feasible:
+        changed = False
+        for name, s in settings.items():
+            num_frames, ny, nx = arrays[name]['data'].shape
+            thinner = _thinner_step(s['frame_step'], num_frames)
+            can_stride = s['stride'] < min(MAX_STRIDE, max(ny, nx))
+            if thinner is not None and (s['frame_step'] <= s['stride'] ** 2 or not can_stride):
+                s['frame_step'] = thinner
+                changed = True
+            elif can_stride:
+                s['stride'] += 1
+                changed = True
+        if not changed:
+            break
+        total, sizes = measure()
+
+    reductions = sorted({(s['frame_step'], s['stride']) for s in settings.values()} - {(1, 1)})
+    for frame_step, stride in reductions:
+        steps.append(f'every {frame_step} frame(s), every {stride} grid point(s)')
+
+    return {
+        'budget': int(max_bytes),
+        'data_mode': mode,
+        'estimated_bytes': int(total),
+        'estimated_seconds': total * 8 / (connection_mbps * 1e6),
+        'connection_mbps': connection_mbps,
+        'fits': total <= max_bytes,
+        'fixed_bytes': int(shell_bytes),
+        'steps': steps,
+        'variables': {
+            name: dict(settings[name],
+                       shape=list(_reduced_shape(arrays[name]['data'].shape, settings[name])),
+                       bytes=int(sizes[name]['inline' if mode == 'inline' else 'sidecar']))
+            for name in variables
+        }
+    }
+
+
+def format_plan(plan: Dict) -> str:
+    """One line per decision of a plan, for printing."""
+    lines = [f"Planned {plan['data_mode']} output: ~{plan['estimated_bytes'] / 1e6:.1f} MB "
+             f"({'within' if plan['fits'] else 'over'} budget of {plan['budget'] / 1e6:.1f} MB, "
+             f"~{plan['estimated_seconds']:.1f} s at {plan['connection_mbps']:g} Mbit/s)"]
+    if plan['fixed_bytes'] >= plan['budget']:
+        lines.append(f"  - infeasible: the page without data alone is "
+                     f"~{plan['fixed_bytes'] / 1e6:.1f} MB; nothing was changed")
+    lines += [f"  - {step}" for step in plan['steps']]
+    for name, choice in plan['variables'].items():
+        if choice['encoding'] == 'raw':
+            precision = 'full'
+        elif choice['precision'] is not None:
+            precision = f"{choice['precision']:g}"
+        else:
+            precision = f"1/{choice['quantization_steps']} of range"
+        lines.append(f"  {name}: {choice['encoding']} (precision {precision}), "
+                     f"shape {'x'.join(map(str, choice['shape']))}, ~{choice['bytes'] / 1e6:.2f} MB")
+    return '\n'.join(lines)
@@ -0,0 +1,69 @@
+"""
+Decimated first-frame preview embedded ahead of the full page payload.
+
+The page draws the preview as soon as its script runs, while the browser is
+still receiving and parsing the full data (or fetching sidecar chunks), and
+replaces it once the first full-resolution frame is drawn.
+"""
+
+import math
+import numpy as np
+from typing import Dict, Optional
+
+from .sidecar import FRAME_FIELDS
+
+# Largest number of grid points along either axis of the preview
+PREVIEW_POINTS = 64
+
+# Preview values are rounded to about this fraction of their range, which
+# keeps the JSON short without any visible change in color
+PREVIEW_STEPS = 1000
+
+
+def _rounded(array: np.ndarray) -> list:
+    """Round an array to ~1/PREVIEW_STEPS of its range and convert it to nested lists."""
+    finite = array[np.isfinite(array)]
+    span = float(finite.max() - finite.min()) if finite.size else 0.0
+    decimals = max(0, math.ceil(-math.log10(span / PREVIEW_STEPS))) if span > 0 else 0
+    return np.round(array.astype(np.float64), decimals).tolist()
+
+
+def build_preview(payload: Dict, arrays: Dict[str, Dict[str, np.ndarray]],
+                  max_points: int = PREVIEW_POINTS) -> Optional[Dict]:
+    """
+    Build a page payload holding a decimated first frame of the first variable.
+
+    Args:
+        payload: Full page payload
+        arrays: Per-variable numpy arrays keyed by field name
+        max_points: Largest number of grid points along either axis
+
+    Returns:
+        Payload with the same settings as ``payload`` and a single one-frame
+        variable stored as plain JSON lists, or None if there are no variables
+    """
+    if not payload['variables']:
+        return None
+    name = next(iter(payload['variables']))
+    variable = payload['variables'][name]
+    source = arrays[name]
+    ny, nx = source['data'].shape[1:]
+    stride = max(1, math.ceil(max(ny, nx) / max_points))
+
+    grid = (slice(None, None, stride), slice(None, None, stride))
+    preview = dict(variable)
+    preview['lon'] = _rounded(source['lon'][grid])
+    preview['lat'] = _rounded(source['lat'][grid])
+    for field in FRAME_FIELDS:
+        array = source.get(field)
+        preview[field] = None if array is None else [_rounded(array[0][grid])]
+    preview['shape'] = [1, *np.asarray(source['data'][0][grid]).shape]
+    preview['timestamps'] = variable['timestamps'][:1]
+    preview['frame_stats'] = {key: values[:1] for key, values in variable['frame_stats'].items()}
+    # Drawn from the decimated grid; images, arcs and masks belong to the full one
+    preview['raster'] = None
+    preview['topology'] = None
+
+    shell = {key: value for key, value in payload.items() if key not in ('variables', 'sidecar', 'masks')}
+    shell['variables'] = {name: preview}
+    return shell
@@ -0,0 +1,242 @@
+"""
+Server-side raster rendering: colormapped PNG frames for image overlays.
+"""
+
+import base64
+import struct
+import zlib
+import numpy as np
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .spatial import rectilinear_axes
+
+
+# Color stops of the browser's chroma.js scales (see getBaseScale in the template)
+COLORMAP_STOPS = {
+    'viridis': ['#440154', '#414487', '#2a788e', '#22a884', '#7ad151', '#fde724'],
+    'plasma': ['#0d0887', '#6a00a8', '#b12a90', '#e16462', '#fca636', '#f0f921'],
+    'jet': ['#0000ff', '#00ffff', '#00ff00', '#ffff00', '#ff0000'],
+    'rainbow': ['#800080', '#0000ff', '#008000', '#ffff00', '#ffa500', '#ff0000'],
+    'cool': ['#00ffff', '#ff00ff'],
+    'hot': ['#000000', '#ff0000', '#ffff00', '#ffffff'],
+    # chroma.scale('YlOrRd'), used for any other colormap name
+    'YlOrRd': ['#ffffcc', '#ffeda0', '#fed976', '#feb24c', '#fd8d3c',
+               '#fc4e2a', '#e31a1c', '#bd0026', '#800026'],
+}
+
+# Gradient of the leaflet.heat layer, reused for server-side heatmaps
+HEATMAP_STOPS = ['#0000ff', '#00ffff', '#00ff00', '#ffff00', '#ff0000']
+
+# Web Mercator is undefined at the poles
+MAX_MERCATOR_LAT = 85.0511287798
+
+# First eccentricity of the WGS84 ellipsoid, on which World Mercator (EPSG:3395) is defined
+WGS84_ECCENTRICITY = float(np.sqrt(1 - (6356752.314245179 / 6378137.0) ** 2))
+
+LUT_SIZE = 256
+
+
+def color_lut(stops: Sequence[str], size: int = LUT_SIZE) -> np.ndarray:
+    """
+    Sample a piecewise-linear RGB color scale into a lookup table.
+
+    Args:
+        stops: Evenly spaced hex colors
+        size: Number of table entries
+
+    Returns:
+        uint8 array of shape (size, 3)
+    """
+    rgb = np.array([[int(c[k:k + 2], 16) for k in (1, 3, 5)] for c in stops], dtype=np.float64)
+    positions = np.linspace(0, 1, len(stops))
+    samples = np.linspace(0, 1, size)
+    lut = np.column_stack([np.interp(samples, positions, rgb[:, k]) for k in range(3)])
+    return np.round(lut).astype(np.uint8)
+
+
+def colorize(values: np.ndarray,
+             lut: np.ndarray,
+             vmin: float,
+             vmax: float,
+             levels: Optional[int] = None) -> np.ndarray:
+    """
+    Map values to RGBA colors through a lookup table.
+
+    Args:
+        values: 2D array of values
+        lut: Color table from color_lut()
+        vmin: Value mapped to the first table entry
+        vmax: Value mapped to the last table entry
+        levels: If set, quantize into this many bands colored like the browser's
+               stacked filled-contour polygons (values below vmin stay transparent)
+
+    Returns:
+        uint8 array of shape values.shape + (4,); NaN values are transparent
+    """
+    values = np.asarray(values, dtype=np.float64)
+    span = vmax - vmin if vmax > vmin else 1.0
+    normalized = (values - vmin) / span
+    valid = np.isfinite(normalized)
+    normalized = np.where(valid, np.clip(normalized, 0, 1), 0)
+
+    rgba = np.zeros(values.shape + (4,), dtype=np.uint8)
+    if levels:
+        # Band k holds values in [vmin + k*step, vmin + (k+1)*step), as d3.contours thresholds
+        band = np.minimum(np.floor(normalized * levels), levels - 1)
+        rgba[..., :3] = lut[np.round(band / levels * (len(lut) - 1)).astype(np.intp)]
+        rgba[..., 3] = np.where(valid & (values >= vmin), 255, 0)
+    else:
+        rgba[..., :3] = lut[np.round(normalized * (len(lut) - 1)).astype(np.intp)]
+        rgba[..., 3] = np.where(valid, 255, 0)
+    return rgba
+
+
+def encode_png(rgba: np.ndarray, compression_level: int = 6) -> bytes:
+    """
+    Encode an RGBA image as PNG using only zlib.
+
+    Args:
+        rgba: uint8 array of shape (height, width, 4), first row at the top
+        compression_level: zlib compression level (0-9)
+
+    Returns:
+        PNG file bytes
+    """
+    height, width = rgba.shape[:2]
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+
+    # Filter type 0 (None) byte in front of every scanline
+    scanlines = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = np.ascontiguousarray(rgba, dtype=np.uint8).reshape(height, width * 4)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' +
+            chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(scanlines.tobytes(), compression_level)) +
+            chunk(b'IEND', b''))
+
+
+def cell_edges(axis: np.ndarray) -> np.ndarray:
+    """Edges of the cells centred on an ascending axis."""
+    if axis.size == 1:
+        return np.array([axis[0] - 0.5, axis[0] + 0.5])
+    middle = 0.5 * (axis[1:] + axis[:-1])
+    return np.concatenate([[2 * axis[0] - middle[0]], middle, [2 * axis[-1] - middle[-1]]])
+
+
+def mercator_y(lat: np.ndarray) -> np.ndarray:
+    """Web Mercator y (in radians of longitude) of latitudes, clipped near the poles."""
+    lat = np.clip(lat, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT)
+    return np.log(np.tan(np.pi / 4 + np.deg2rad(lat) / 2))
+
+
+def world_mercator_y(lat: np.ndarray) -> np.ndarray:
+    """World Mercator (ellipsoidal, EPSG:3395) y in radians of longitude, clipped near the poles."""
+    lat = np.deg2rad(np.clip(lat, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    e_sin = WGS84_ECCENTRICITY * np.sin(lat)
+    return np.log(np.tan(np.pi / 4 + lat / 2)) + \
+        WGS84_ECCENTRICITY / 2 * np.log((1 - e_sin) / (1 + e_sin))
+
+
+def projection_y(projection: str) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+    """
+    Vertical transform in which Leaflet stretches image overlays for a projection.
+
+    Args:
+        projection: Map projection (see MapPlot)
+
+    Returns:
+        Function of latitude, or None if y is linear in latitude
+    """
+    if projection == 'EPSG3857':
+        return mercator_y
+    if projection == 'EPSG3395':
+        return world_mercator_y
+    return None
+
+
+def _pixel_cells(axis: np.ndarray, transform=None) -> Tuple[np.ndarray, float, float]:
+    """
+    Map evenly spaced output pixels onto the cells of a monotonic axis.
+
+    Leaflet stretches an image overlay linearly in projected coordinates, so
+    pixels are laid out evenly in transform(axis) space and each one takes
+    the value of the grid cell it falls into.
+
+    Returns:
+        Tuple of (cell index per pixel, low edge, high edge)
+    """
+    ascending = axis.size < 2 or axis[-1] > axis[0]
+    order = np.arange(axis.size) if ascending else np.arange(axis.size)[::-1]
+    edges = cell_edges(axis[order])
+    if transform is not None:
+        edges = np.clip(edges, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT)
+    projected = edges if transform is None else transform(edges)
+
+    pixels = np.linspace(projected[0], projected[-1], axis.size, endpoint=False)
+    pixels += 0.5 * (projected[-1] - projected[0]) / axis.size
+    cells = np.clip(np.searchsorted(projected, pixels, side='right') - 1, 0, axis.size - 1)
+    return order[cells], edges[0], edges[-1]
+
+
+def render_raster(lon: np.ndarray,
+                  lat: np.ndarray,
+                  data: np.ndarray,
+                  colormap: str,
+                  vmin: float,
+                  vmax: float,
+                  levels: int = 10,
+                  frame_ranges: Optional[Sequence[Sequence[float]]] = None,
+                  projection: str = 'EPSG3857') -> Dict:
+    """
+    Colormap every frame of a rectilinear grid into a PNG for an image overlay.
+
+    Values are quantized into ``levels`` bands colored like the browser's
+    stacked filled-contour polygons. Rows are resampled to be evenly spaced
+    in the map's projected y (spherical Web Mercator, ellipsoidal World
+    Mercator, or latitude for equirectangular maps).
+
+    Args:
+        lon: 2D longitude mesh (lat, lon)
+        lat: 2D latitude mesh (lat, lon)
+        data: 3D array (time, lat, lon)
+        colormap: Colormap name as passed to add_variable
+        vmin: Lower color limit
+        vmax: Upper color limit
+        levels: Number of color bands
+        frame_ranges: Optional per-frame (vmin, vmax) pairs overriding vmin/vmax
+        projection: Map projection (see MapPlot)
+
+    Returns:
+        Dictionary with a single entry in 'bands' holding 'min_zoom' (0),
+        'bounds' ([[south, west], [north, east]]) and 'frames' (PNG data URLs);
+        the same layout as heatmap.kde_heatmap()
+    """
+    axes = rectilinear_axes(lon, lat)
+    if axes is None:
+        raise ValueError("render='raster' requires a rectilinear lon/lat grid")
+    lon_axis, lat_axis = axes
+
+    transform = projection_y(projection)
+    rows, south, north = _pixel_cells(lat_axis, transform)
+    cols, west, east = _pixel_cells(lon_axis)
+    # Image rows run from north to south
+    rows = rows[::-1]
+
+    lut = color_lut(COLORMAP_STOPS.get(colormap, COLORMAP_STOPS['YlOrRd']))
+
+    frames: List[str] = []
+    for t in range(data.shape[0]):
+        lo, hi = frame_ranges[t] if frame_ranges is not None else (vmin, vmax)
+        rgba = colorize(data[t][np.ix_(rows, cols)], lut, lo, hi, levels=levels)
+        frames.append('data:image/png;base64,' + base64.b64encode(encode_png(rgba)).decode('ascii'))
+
+    return {
+        'bands': [{
+            'min_zoom': 0,
+            'bounds': [[float(south), float(west)], [float(north), float(east)]],
+            'frames': frames
+        }]
+    }
@@ -0,0 +1,303 @@
+"""
+Regridding from curvilinear lon/lat meshes onto regular grids with reusable sparse weights.
+"""
+
+import numpy as np
+from typing import Optional, Tuple
+
+# Upper bound on candidate (quad, target point) pairs tested at once
+CANDIDATE_BATCH = 4_000_000
+
+# Upper bound on elements of the (frames, nonzeros) product computed at once
+APPLY_BATCH = 32_000_000
+
+# Tolerance on the unit-square test of the inverse bilinear map
+INSIDE_TOLERANCE = 1e-9
+
+
+def _median_spacing(lon: np.ndarray, lat: np.ndarray) -> float:
+    """Median distance in degrees between neighbouring mesh nodes."""
+    steps = []
+    for axis in (0, 1):
+        d = np.hypot(np.diff(lon, axis=axis), np.diff(lat, axis=axis))
+        steps.append(d[np.isfinite(d) & (d > 0)])
+    steps = np.concatenate(steps)
+    return float(np.median(steps)) if steps.size else 1.0
+
+
+def regular_grid(lon: np.ndarray,
+                 lat: np.ndarray,
+                 resolution: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build a regular lon/lat grid covering a mesh.
+
+    Args:
+        lon: 2D source longitude mesh
+        lat: 2D source latitude mesh
+        resolution: Grid spacing in degrees (default: median source node spacing)
+
+    Returns:
+        Tuple of (lon axis, lat axis), both ascending
+    """
+    if resolution is None:
+        resolution = _median_spacing(lon, lat)
+    if resolution <= 0:
+        raise ValueError("resolution must be positive")
+    west, east = np.nanmin(lon), np.nanmax(lon)
+    south, north = np.nanmin(lat), np.nanmax(lat)
+    lon_axis = np.arange(west, east + 0.5 * resolution, resolution)
+    lat_axis = np.arange(south, north + 0.5 * resolution, resolution)
+    return lon_axis, lat_axis
+
+
+def _cross(ax, ay, bx, by):
+    return ax * by - ay * bx
+
+
+def locate_in_quads(lon: np.ndarray,
+                    lat: np.ndarray,
+                    x0: float, dx: float, nx: int,
+                    y0: float, dy: float, ny: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find, for points of a regular grid, the source quad containing each one.
+
+    Quads are the cells spanned by four neighbouring mesh nodes. Candidate
+    points for a quad are those of the regular grid inside its bounding box,
+    found by index arithmetic, and each candidate is tested by inverting the
+    quad's bilinear map, so no spatial search structure is needed.
+
+    Args:
+        lon: 2D source longitude mesh
+        lat: 2D source latitude mesh
+        x0, dx, nx: First longitude, spacing and count of the target points
+        y0, dy, ny: First latitude, spacing and count of the target points
+
+    Returns:
+        Tuple of (flat target point index, quad row, quad column, (s, t) array of
+        shape (n, 2)) for every target point inside the mesh; s runs along
+        columns and t along rows of the quad
+    """
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    rows, cols = lon.shape[0] - 1, lon.shape[1] - 1
+    if rows < 1 or cols < 1:
+        raise ValueError("regridding needs a source mesh of at least 2x2 nodes")
+
+    corners_x = np.stack([lon[:-1, :-1], lon[:-1, 1:], lon[1:, :-1], lon[1:, 1:]]).reshape(4, -1)
+    corners_y = np.stack([lat[:-1, :-1], lat[:-1, 1:], lat[1:, :-1], lat[1:, 1:]]).reshape(4, -1)
+    usable = np.isfinite(corners_x).all(axis=0) & np.isfinite(corners_y).all(axis=0)
+    quads = np.flatnonzero(usable)
+
+    # Target index ranges covered by each quad's bounding box
+    jx0 = np.clip(np.ceil((corners_x[:, quads].min(axis=0) - x0) / dx), 0, nx).astype(np.int64)
+    jx1 = np.clip(np.floor((corners_x[:, quads].max(axis=0) - x0) / dx), -1, nx - 1).astype(np.int64)
+    iy0 = np.clip(np.ceil((corners_y[:, quads].min(axis=0) - y0) / dy), 0, ny).astype(np.int64)
+    iy1 = np.clip(np.floor((corners_y[:, quads].max(axis=0) - y0) / dy), -1, ny - 1).astype(np.int64)
+    widths = np.maximum(jx1 - jx0 + 1, 0)
+    counts = widths * np.maximum(iy1 - iy0 + 1, 0)
+
+    found_points, found_quads, found_st = [], [], []
+    start = 0
+    while start < quads.size:
+        # Grow the batch until it holds CANDIDATE_BATCH candidates
+        totals = np.cumsum(counts[start:])
+        stop = start + max(1, int(np.searchsorted(totals, CANDIDATE_BATCH, side='right')))
+        batch = np.arange(start, stop)
+        start = stop
+
+        n = counts[batch]
+        if n.sum() == 0:
+            continue
+        owner = np.repeat(batch, n)
+        offset = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        px_index = jx0[owner] + offset % widths[owner]
+        py_index = iy0[owner] + offset // widths[owner]
+        px = x0 + px_index * dx
+        py = y0 + py_index * dy
+
+        q = quads[owner]
+        ax, bx, dxq, cx = corners_x[:, q]
+        ay, by, dyq, cy = corners_y[:, q]
+        # p = a + s*e + t*f + s*t*g
+        ex, ey = bx - ax, by - ay
+        fx, fy = dxq - ax, dyq - ay
+        gx, gy = ax - bx + cx - dxq, ay - by + cy - dyq
+        hx, hy = px - ax, py - ay
+
+        k2 = _cross(gx, gy, fx, fy)
+        k1 = _cross(ex, ey, fx, fy) + _cross(hx, hy, gx, gy)
+        k0 = _cross(hx, hy, ex, ey)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            root = np.sqrt(np.maximum(k1 * k1 - 4 * k0 * k2, 0))
+            linear = np.abs(k2) < 1e-12 * np.maximum(np.abs(k1), 1e-300)
+            t_plus = np.where(linear, -k0 / k1, (-k1 + root) / (2 * k2))
+            t_minus = np.where(linear, -k0 / k1, (-k1 - root) / (2 * k2))
+            t = np.where((t_minus >= -INSIDE_TOLERANCE) & (t_minus <= 1 + INSIDE_TOLERANCE), t_minus, t_plus)
+            denom_x = ex + gx * t
+            denom_y = ey + gy * t
+            s = np.where(np.abs(denom_x) >= np.abs(denom_y),
+                         (hx - fx * t) / denom_x, (hy - fy * t) / denom_y)
+
+        inside = ((s >= -INSIDE_TOLERANCE) & (s <= 1 + INSIDE_TOLERANCE) &
+                  (t >= -INSIDE_TOLERANCE) & (t <= 1 + INSIDE_TOLERANCE))
+        found_points.append(py_index[inside] * nx + px_index[inside])
+        found_quads.append(q[inside])
+        found_st.append(np.column_stack([np.clip(s[inside], 0, 1), np.clip(t[inside], 0, 1)]))
+
+    if not found_points:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, np.zeros((0, 2))
+
+    points = np.concatenate(found_points)
+    quad_ids = np.concatenate(found_quads)
+    st = np.concatenate(found_st)
+    # Points on shared edges fall in several quads; keep one
+    points, first = np.unique(points, return_index=True)
+    quad_row, quad_col = np.divmod(quad_ids[first], cols)
+    return points, quad_row, quad_col, st[first]
+
+
+class Regridder:
+    """
+    Sparse interpolation weights from a lon/lat mesh to a regular grid.
+
+    Weights are computed once per source/target pair and stored in CSR form
+    (one row per target cell), then applied to any number of frames with a
+    single gather-multiply-reduce per batch of frames.
+
+    Methods:
+        - 'bilinear': Bilinear interpolation inside the source cell (quad of four
+          nodes) containing each target point; exact inverse of the quad's
+          bilinear map, so curvilinear meshes are handled correctly.
+        - 'conservative': Area-weighted average of the source cells (the areas
+          closest to each node) overlapping each target cell. Overlaps are
+          estimated by supersampling every target cell, so this is first-order
+          conservative; use it when the target is coarser than the source.
+    """
+
+    def __init__(self,
+                 lon: np.ndarray,
+                 lat: np.ndarray,
+                 target_lon: np.ndarray,
+                 target_lat: np.ndarray,
+                 method: str = 'bilinear',
+                 min_coverage: float = 0.5,
+                 supersample: Optional[int] = None):
+        """
+        Initialize Regridder.
+
+        Args:
+            lon: 2D source longitude mesh (lat, lon)
+            lat: 2D source latitude mesh (lat, lon)
+            target_lon: Evenly spaced, ascending target longitude axis
+            target_lat: Evenly spaced, ascending target latitude axis
+            method: 'bilinear' or 'conservative'
+            min_coverage: Fraction of a target cell (or of a target point's interpolation
+                         weights) that must be covered by valid (non-NaN) source values,
+                         otherwise the result is NaN
+            supersample: Sub-points per target cell edge for 'conservative'
+                        (auto from the source/target resolution ratio if None)
+        """
+        if method not in ('bilinear', 'conservative'):
+            raise ValueError(f"Unknown regrid method '{method}', expected 'bilinear' or 'conservative'")
+        lon = np.asarray(lon, dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+        if lon.shape != lat.shape or lon.ndim != 2:
+            raise ValueError("lon and lat must be 2D arrays of the same shape")
+        target_lon = np.asarray(target_lon, dtype=np.float64)
+        target_lat = np.asarray(target_lat, dtype=np.float64)
+        for axis in (target_lon, target_lat):
+            if axis.ndim != 1 or axis.size < 2 or not np.allclose(np.diff(axis), axis[1] - axis[0]) \
+                    or axis[1] <= axis[0]:
+                raise ValueError("target axes must be evenly spaced and ascending with at least 2 points")
+
+        self.method = method
+        self.min_coverage = min_coverage
+        self.source_shape = lon.shape
+        self.target_lon = target_lon
+        self.target_lat = target_lat
+        self.shape = (target_lat.size, target_lon.size)
+
+        dx = target_lon[1] - target_lon[0]
+        dy = target_lat[1] - target_lat[0]
+        nx_src = lon.shape[1]
+
+        if method == 'bilinear':
+            points, qi, qj, st = locate_in_quads(lon, lat, target_lon[0], dx, target_lon.size,
+                                                 target_lat[0], dy, target_lat.size)
+            s, t = st[:, 0], st[:, 1]
+            base = qi * nx_src + qj
+            rows = np.repeat(points, 4)
+            columns = np.column_stack([base, base + 1, base + nx_src, base + nx_src + 1]).reshape(-1)
+            weights = np.column_stack([(1 - s) * (1 - t), s * (1 - t), (1 - s) * t, s * t]).reshape(-1)
+        else:
+            if supersample is None:
+                ratio = max(dx, dy) / _median_spacing(lon, lat)
+                supersample = int(np.clip(np.ceil(2 * ratio), 2, 16))
+            m = supersample
+            sub_x0 = target_lon[0] - dx / 2 + dx / (2 * m)
+            sub_y0 = target_lat[0] - dy / 2 + dy / (2 * m)
+            sub_nx = target_lon.size * m
+            points, qi, qj, st = locate_in_quads(lon, lat, sub_x0, dx / m, sub_nx,
+                                                 sub_y0, dy / m, target_lat.size * m)
+            # Each sub-point belongs to the nearest node of its quad, and to the
+            # target cell it was generated from
+            node = (qi + np.round(st[:, 1]).astype(np.int64)) * nx_src + qj + np.round(st[:, 0]).astype(np.int64)
+            sub_row, sub_col = np.divmod(points, sub_nx)
+            target = (sub_row // m) * target_lon.size + sub_col // m
+            pairs, hits = np.unique(target * lon.size + node, return_counts=True)
+            rows, columns = np.divmod(pairs, lon.size)
+            weights = hits / float(m * m)
+
+        # CSR layout, rows sorted by target cell
+        keep = weights > 0
+        rows, columns, weights = rows[keep], columns[keep], weights[keep]
+        order = np.argsort(rows, kind='stable')
+        self.indices = columns[order].astype(np.int64)
+        self.weights = weights[order]
+        row_counts = np.bincount(rows, minlength=self.shape[0] * self.shape[1])
+        self.indptr = np.concatenate([[0], np.cumsum(row_counts)])
+
+    @property
+    def nnz(self) -> int:
+        """Number of stored weights."""
+        return int(self.weights.size)
+
+    def __call__(self, data: np.ndarray) -> np.ndarray:
+        """
+        Regrid one or more fields.
+
+        Args:
+            data: Array (..., lat, lon) on the source mesh
+
+        Returns:
+            Array (..., target lat, target lon); cells outside the source mesh
+            or with too little valid source data are NaN
+        """
+        data = np.asarray(data)
+        if data.shape[-2:] != self.source_shape:
+            raise ValueError(f"data shape {data.shape[-2:]} does not match the source grid {self.source_shape}")
+        leading = data.shape[:-2]
+        frames = data.reshape(-1, self.source_shape[0] * self.source_shape[1])
+        out = np.full((frames.shape[0], self.shape[0] * self.shape[1]), np.nan)
+
+        nonempty = np.flatnonzero(np.diff(self.indptr) > 0)
+        if nonempty.size:
+            starts = self.indptr[nonempty]
+            batch = max(1, APPLY_BATCH // max(self.nnz, 1))
+            for first in range(0, frames.shape[0], batch):
+                values = frames[first:first + batch, self.indices].astype(np.float64)
+                valid = np.isfinite(values)
+                weighted = np.where(valid, values * self.weights, 0.0)
+                numerator = np.add.reduceat(weighted, starts, axis=1)
+                coverage = np.add.reduceat(np.where(valid, self.weights, 0.0), starts, axis=1)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    result = numerator / coverage
+                result[coverage < self.min_coverage] = np.nan
+                out[first:first + batch, nonempty] = result
+
+        return out.reshape(leading + self.shape).astype(data.dtype if data.dtype.kind == 'f' else np.float64)
+
+    def target_mesh(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the 2D (lon, lat) meshes of the target grid."""
+        return np.meshgrid(self.target_lon, self.target_lat)
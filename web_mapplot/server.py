@@ -2,8 +2,61 @@
 Flask web server for serving MapPlot visualizations.
 """
 
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, Response, render_template_string, jsonify, request
 import json
+import threading
+from typing import Dict, List
+
+
+class PerfLog:
+    """
+    Aggregate render timings that pages report through their perf beacon.
+
+    Each report holds the timings recorded since the page's previous report,
+    so counts and totals are simply summed per (variable, plot type, kind).
+    """
+
+    def __init__(self):
+        self.reports = 0
+        self._timings = {}
+        self._lock = threading.Lock()
+
+    def add(self, summary: Dict):
+        """
+        Add one beacon report.
+
+        Args:
+            summary: Parsed report with a 'timings' list of entries holding
+                    'variable', 'plot_type', 'kind', 'count', 'total_ms' and 'max_ms'
+        """
+        timings = summary.get('timings') if isinstance(summary, dict) else None
+        if not isinstance(timings, list):
+            raise ValueError("perf report needs a 'timings' list")
+        try:
+            # Frame switches cover all layers and carry no plot type
+            entries = [((str(entry['variable']),
+                         None if entry.get('plot_type') is None else str(entry['plot_type']),
+                         str(entry['kind'])),
+                        int(entry['count']), float(entry['total_ms']), float(entry['max_ms']))
+                       for entry in timings]
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Malformed perf timing entry: {e}")
+
+        with self._lock:
+            self.reports += 1
+            for key, count, total_ms, max_ms in entries:
+                aggregate = self._timings.setdefault(key, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+                aggregate['count'] += count
+                aggregate['total_ms'] += total_ms
+                aggregate['max_ms'] = max(aggregate['max_ms'], max_ms)
+
+    def report(self) -> List[Dict]:
+        """Aggregated timings, slowest total first."""
+        with self._lock:
+            rows = [dict(aggregate, variable=variable, plot_type=plot_type, kind=kind,
+                         mean_ms=aggregate['total_ms'] / max(aggregate['count'], 1))
+                    for (variable, plot_type, kind), aggregate in self._timings.items()]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
 
 
 def run_server(mapplot_instance, port=5000, debug=False):
@@ -16,10 +69,14 @@ def run_server(mapplot_instance, port=5000, debug=False):
         debug: Enable debug mode
     """
     app = Flask(__name__)
+    perf_log = PerfLog()
 
     @app.route('/')
     def index():
-        html = mapplot_instance._generate_html()
+        payload = mapplot_instance._build_payload()
+        # Lets the page query the endpoints below
+        payload['api'] = '/api/'
+        html = mapplot_instance._generate_html(payload)
         return render_template_string(html)
 
     @app.route('/api/data')
@@ -28,9 +85,80 @@ def run_server(mapplot_instance, port=5000, debug=False):
             'title': mapplot_instance.title,
             'center': mapplot_instance.center,
             'zoom': mapplot_instance.zoom,
+            'masks': mapplot_instance._payload_masks(mapplot_instance.variables),
             'variables': mapplot_instance.variables
         })
 
+    @app.route('/api/variables/<name>')
+    def get_variable_window(name):
+        """
+        Return a window of a variable as raw little-endian float32.
+
+        Query parameters: bbox=west,south,east,north, stride=k, t=i and
+        field=data|u_component|v_component|lon|lat (all optional). The array
+        shape and the index window are returned in X-Shape, X-Rows and X-Cols
+        headers (rows/cols as start,stop,stride).
+        """
+        if name not in mapplot_instance.variables:
+            return jsonify({'error': f"Unknown variable '{name}'"}), 404
+        try:
+            bbox = request.args.get('bbox')
+            if bbox is not None:
+                bbox = tuple(float(v) for v in bbox.split(','))
+                if len(bbox) != 4:
+                    raise ValueError("bbox must have four values: west,south,east,north")
+            stride = int(request.args.get('stride', 1))
+            t = request.args.get('t')
+            t = int(t) if t is not None else None
+            window = mapplot_instance.subset(name, bbox=bbox, stride=stride, t=t,
+                                             field=request.args.get('field', 'data'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if window is None:
+            return jsonify({'error': 'No grid points inside bbox'}), 404
+
+        values = window['values']
+        response = Response(values.tobytes(), mimetype='application/octet-stream')
+        response.headers['X-Shape'] = ','.join(str(n) for n in values.shape)
+        response.headers['X-Rows'] = f"{window['rows'][0]},{window['rows'][1]},{stride}"
+        response.headers['X-Cols'] = f"{window['cols'][0]},{window['cols'][1]},{stride}"
+        return response
+
+    @app.route('/api/variables/<name>/timeseries')
+    def get_timeseries(name):
+        if name not in mapplot_instance.variables:
+            return jsonify({'error': f"Unknown variable '{name}'"}), 404
+        try:
+            lat = float(request.args['lat'])
+            lon = float(request.args['lon'])
+        except (KeyError, ValueError):
+            return jsonify({'error': 'lat and lon query parameters are required'}), 400
+        field = request.args.get('field', 'data')
+        if field not in ('data', 'u_component', 'v_component'):
+            return jsonify({'error': f"Unknown field '{field}'"}), 400
+
+        try:
+            series = mapplot_instance.timeseries(name, lat, lon, field=field)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if series is None:
+            return jsonify({'error': 'Location is outside the grid'}), 404
+        return jsonify(series)
+
+    @app.route('/api/perf', methods=['POST'])
+    def post_perf():
+        """Collect a render timing report sent by the page's perf beacon."""
+        try:
+            perf_log.add(request.get_json(force=True, silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return '', 204
+
+    @app.route('/api/perf')
+    def get_perf():
+        """Render timings reported by all pages, per variable, plot type and kind."""
+        return jsonify({'reports': perf_log.reports, 'timings': perf_log.report()})
+
     print(f"Starting server on http://localhost:{port}")
     print("Press Ctrl+C to stop the server")
     app.run(host='0.0.0.0', port=port, debug=debug)
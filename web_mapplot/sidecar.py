@@ -0,0 +1,107 @@
+"""
+Sidecar data directories: variable arrays written as binary chunks next to the HTML shell.
+
+Chunks are content-addressed (see chunkstore.py): the manifest maps every
+variable/field/frame to the hash-named chunk holding it, so unchanged frames
+keep their file names across re-exports.
+"""
+
+import base64
+import copy
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, Tuple
+
+from .chunkstore import ChunkStore, MANIFEST_NAME
+
+# Fields that hold a (time, lat, lon) array
+FRAME_FIELDS = ('data', 'u_component', 'v_component')
+
+# Fields that hold a (lat, lon) coordinate mesh
+GRID_FIELDS = ('lon', 'lat')
+
+
+def _float32_descriptor(array: np.ndarray, chunks) -> Dict:
+    return {
+        'encoding': 'float32',
+        'location': 'sidecar',
+        'shape': list(array.shape),
+        'chunks': chunks
+    }
+
+
+def write_sidecar(payload: Dict,
+                  arrays: Dict[str, Dict[str, np.ndarray]],
+                  data_dir: Path) -> Tuple[Dict, ChunkStore]:
+    """
+    Move variable arrays out of a page payload into a directory of binary chunks.
+
+    Coordinate meshes become one float32 chunk each, raw fields one float32
+    chunk per frame, and delta-encoded fields one zlib chunk per keyframe
+    group; chunks of masked fields hold only the valid cells. Raster overlay
+    frames become one PNG chunk each. The returned payload keeps all
+    metadata but references chunks by path (relative to ``data_dir``) so
+    the page can ``fetch`` them lazily.
+    A ``manifest.json`` with the same content is written into ``data_dir``.
+    Chunks that already exist in ``data_dir`` are not written again.
+
+    Args:
+        payload: Page payload as built by MapPlot._build_payload()
+        arrays: Per-variable numpy arrays keyed by field name
+        data_dir: Output directory for chunks and manifest
+
+    Returns:
+        Tuple of (payload referencing the chunks, ChunkStore with write statistics)
+    """
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    store = ChunkStore(data_dir)
+
+    shell = copy.copy(payload)
+    shell['variables'] = {}
+
+    for name, variable in payload['variables'].items():
+        variable = dict(variable)
+
+        for field in GRID_FIELDS:
+            grid = np.asarray(arrays[name][field], dtype='<f4')
+            variable[field] = _float32_descriptor(grid, [store.put(grid.tobytes())])
+
+        for field in FRAME_FIELDS:
+            encoded = variable.get(field)
+            if encoded is None:
+                continue
+            if isinstance(encoded, dict):
+                suffix = '.zlib' if encoded['encoding'] == 'delta' else '.bin'
+                descriptor = dict(encoded, location='sidecar')
+                descriptor['chunks'] = [
+                    store.put(base64.b64decode(chunk), suffix=suffix)
+                    for chunk in encoded['chunks']
+                ]
+            else:
+                frames = np.asarray(arrays[name][field], dtype='<f4')
+                descriptor = _float32_descriptor(frames, [store.put(frame.tobytes()) for frame in frames])
+            variable[field] = descriptor
+
+        raster = variable.get('raster')
+        if raster is not None:
+            variable['raster'] = {
+                'bands': [
+                    {
+                        'location': 'sidecar',
+                        'min_zoom': band['min_zoom'],
+                        'bounds': band['bounds'],
+                        'chunks': [
+                            store.put(base64.b64decode(frame.split(',', 1)[1]), suffix='.png')
+                            for frame in band['frames']
+                        ]
+                    }
+                    for band in raster['bands']
+                ]
+            }
+
+        shell['variables'][name] = variable
+
+    (data_dir / MANIFEST_NAME).write_text(json.dumps(shell), encoding='utf-8')
+    return shell, store
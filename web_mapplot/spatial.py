@@ -0,0 +1,241 @@
+"""
+Spatial lookups on lon/lat grids.
+"""
+
+import numpy as np
+from typing import Optional, Tuple
+
+
+def rectilinear_axes(lon: np.ndarray, lat: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Return the 1D axes of a rectilinear grid.
+
+    A mesh is rectilinear when every row shares the same longitudes, every
+    column shares the same latitudes and both axes are strictly monotonic,
+    so a location can be found with a binary search per axis.
+
+    Args:
+        lon: 2D longitude mesh (lat, lon)
+        lat: 2D latitude mesh (lat, lon)
+
+    Returns:
+        Tuple of (lon axis, lat axis), or None if the grid is curvilinear
+    """
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    if lon.ndim != 2 or lon.shape != lat.shape:
+        return None
+
+    lon_axis = lon[0]
+    lat_axis = lat[:, 0]
+    if not (np.all(np.isfinite(lon_axis)) and np.all(np.isfinite(lat_axis))):
+        return None
+    if not (np.array_equal(lon, np.broadcast_to(lon_axis, lon.shape)) and
+            np.array_equal(lat, np.broadcast_to(lat_axis[:, np.newaxis], lat.shape))):
+        return None
+
+    for axis in (lon_axis, lat_axis):
+        steps = np.diff(axis)
+        if steps.size and not (np.all(steps > 0) or np.all(steps < 0)):
+            return None
+
+    return lon_axis, lat_axis
+
+
+def _nearest_on_axis(axis: np.ndarray, x: float) -> int:
+    """Index of the axis value nearest to x, or -1 if x lies beyond half a cell past either end."""
+    n = axis.size
+    if n == 1:
+        return 0
+    ascending = axis[-1] > axis[0]
+    position = np.searchsorted(axis if ascending else -axis, x if ascending else -x)
+    candidates = [k for k in (position - 1, position) if 0 <= k < n]
+    k = min(candidates, key=lambda c: abs(axis[c] - x))
+    spacing = abs(axis[k - 1 if k == n - 1 else k + 1] - axis[k])
+    return int(k) if abs(axis[k] - x) <= spacing / 2 else -1
+
+
+class KDTree:
+    """
+    Static 2D KD-tree stored as a permutation of the input points.
+
+    Each index range is split at its median along alternating axes until it
+    holds at most ``leaf_size`` points, which are then scanned in one
+    vectorized distance computation.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 16):
+        """
+        Initialize KDTree.
+
+        Args:
+            points: Array of shape (n, 2)
+            leaf_size: Maximum number of points scanned linearly per leaf
+        """
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        self.leaf_size = max(1, leaf_size)
+        self.order = np.arange(len(self.points))
+
+        stack = [(0, len(self.points), 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if hi - lo <= self.leaf_size:
+                continue
+            mid = (hi - lo) // 2
+            subset = self.order[lo:hi]
+            self.order[lo:hi] = subset[np.argpartition(self.points[subset, axis], mid)]
+            stack.append((lo, lo + mid, 1 - axis))
+            stack.append((lo + mid + 1, hi, 1 - axis))
+
+    def query(self, point: Tuple[float, float]) -> Tuple[float, int]:
+        """
+        Find the nearest point.
+
+        Args:
+            point: Query coordinates (x, y)
+
+        Returns:
+            Tuple of (squared distance, index into the input points); index is
+            -1 for an empty tree
+        """
+        x = np.asarray(point, dtype=np.float64)
+        best_dist = np.inf
+        best_index = -1
+
+        stack = [(0, len(self.points), 0, 0.0)]
+        while stack:
+            lo, hi, axis, bound = stack.pop()
+            if lo >= hi or bound >= best_dist:
+                continue
+            if hi - lo <= self.leaf_size:
+                candidates = self.order[lo:hi]
+                dists = ((self.points[candidates] - x) ** 2).sum(axis=1)
+                k = int(np.argmin(dists))
+                if dists[k] < best_dist:
+                    best_dist = float(dists[k])
+                    best_index = int(candidates[k])
+                continue
+
+            mid = lo + (hi - lo) // 2
+            median = self.order[mid]
+            dist = float(((self.points[median] - x) ** 2).sum())
+            if dist < best_dist:
+                best_dist = dist
+                best_index = int(median)
+
+            diff = float(x[axis] - self.points[median, axis])
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            # Far side first so the near side is searched first
+            stack.append((far[0], far[1], 1 - axis, diff * diff))
+            stack.append((near[0], near[1], 1 - axis, 0.0))
+
+        return best_dist, best_index
+
+
+class GridIndex:
+    """
+    Locate the grid cell nearest to a lat/lon position.
+
+    Rectilinear grids are searched by bisection on their axes. Curvilinear
+    grids use a KD-tree over equirectangular coordinates (longitudes scaled
+    by the cosine of the mean latitude). Positions outside the grid resolve
+    to None.
+    """
+
+    def __init__(self, lon: np.ndarray, lat: np.ndarray):
+        """
+        Initialize GridIndex.
+
+        Args:
+            lon: 2D longitude mesh (lat, lon)
+            lat: 2D latitude mesh (lat, lon)
+        """
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.shape = self.lon.shape
+        self.axes = rectilinear_axes(self.lon, self.lat)
+        self.tree = None
+
+        if self.axes is None:
+            valid = np.isfinite(self.lon) & np.isfinite(self.lat)
+            self.lon_scale = np.cos(np.deg2rad(self.lat[valid].mean())) if valid.any() else 1.0
+            self.cells = np.flatnonzero(valid)
+            self.tree = KDTree(np.column_stack([self.lon[valid] * self.lon_scale, self.lat[valid]]))
+
+    def locate(self, lat: float, lon: float) -> Optional[Tuple[int, int]]:
+        """
+        Find the grid cell containing a position.
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            (row, column) of the nearest grid point, or None if the position
+            lies outside the grid
+        """
+        if self.axes is not None:
+            lon_axis, lat_axis = self.axes
+            i = _nearest_on_axis(lat_axis, lat)
+            j = _nearest_on_axis(lon_axis, lon)
+            return None if i < 0 or j < 0 else (i, j)
+
+        dist, k = self.tree.query((lon * self.lon_scale, lat))
+        if k < 0:
+            return None
+        i, j = np.unravel_index(self.cells[k], self.shape)
+
+        # Reject positions farther than half a diagonal of the widest neighbour spacing
+        reach = 0.0
+        for ni, nj in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+            if 0 <= ni < self.shape[0] and 0 <= nj < self.shape[1]:
+                d = ((self.lon[ni, nj] - self.lon[i, j]) * self.lon_scale) ** 2 + \
+                    (self.lat[ni, nj] - self.lat[i, j]) ** 2
+                if np.isfinite(d):
+                    reach = max(reach, d)
+        if dist > reach / 2 and dist > 0:
+            return None
+        return int(i), int(j)
+
+    def window(self, west: float, south: float, east: float, north: float) -> Optional[Tuple[slice, slice]]:
+        """
+        Find the index window covering a bounding box.
+
+        Rectilinear grids are cut with two binary searches per axis. For
+        curvilinear grids the window is the smallest row/column range that
+        contains every grid point inside the box.
+
+        Args:
+            west, south, east, north: Bounding box in degrees
+
+        Returns:
+            (row slice, column slice), or None if no grid point lies in the box
+        """
+        if west > east or south > north:
+            raise ValueError("bbox must be ordered as west,south,east,north")
+
+        if self.axes is not None:
+            lon_axis, lat_axis = self.axes
+            rows = _axis_range(lat_axis, south, north)
+            cols = _axis_range(lon_axis, west, east)
+            if rows is None or cols is None:
+                return None
+            return slice(*rows), slice(*cols)
+
+        inside = (self.lon >= west) & (self.lon <= east) & (self.lat >= south) & (self.lat <= north)
+        rows = np.flatnonzero(inside.any(axis=1))
+        cols = np.flatnonzero(inside.any(axis=0))
+        if rows.size == 0:
+            return None
+        return slice(int(rows[0]), int(rows[-1]) + 1), slice(int(cols[0]), int(cols[-1]) + 1)
+
+
+def _axis_range(axis: np.ndarray, low: float, high: float) -> Optional[Tuple[int, int]]:
+    """Index range [start, stop) of a monotonic axis whose values lie in [low, high]."""
+    if axis.size > 1 and axis[-1] < axis[0]:
+        start = int(np.searchsorted(-axis, -high, side='left'))
+        stop = int(np.searchsorted(-axis, -low, side='right'))
+    else:
+        start = int(np.searchsorted(axis, low, side='left'))
+        stop = int(np.searchsorted(axis, high, side='right'))
+    return (start, stop) if stop > start else None
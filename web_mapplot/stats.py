@@ -0,0 +1,183 @@
+"""
+Per-frame statistics and histogram-based percentile estimates.
+"""
+
+import re
+import numpy as np
+from typing import Dict, Optional, Sequence, Union
+
+
+DEFAULT_BINS = 256
+
+# Values per chunk; bounds the temporaries of a frame pass regardless of grid size
+STATS_CHUNK = 1 << 16
+
+_PERCENTILE_PATTERN = re.compile(r'^p(\d+(?:\.\d+)?)$')
+
+
+def frame_statistics(data: np.ndarray, bins: int = DEFAULT_BINS) -> Dict[str, np.ndarray]:
+    """
+    Compute min, max, mean, valid count and a fixed-bin histogram for every frame.
+
+    Each frame is scanned in chunks of STATS_CHUNK values, so temporaries stay
+    small however large the grid is. The first pass accumulates min, max, sum
+    and count of the finite values; the second bins them into a histogram
+    spanning the frame's own [min, max] range.
+
+    Args:
+        data: 3D array (time, lat, lon)
+        bins: Number of histogram bins per frame
+
+    Returns:
+        Dictionary of per-frame arrays: 'min', 'max', 'mean', 'count' and
+        'histogram' (shape (time, bins))
+    """
+    num_frames = data.shape[0]
+    stats = {
+        'min': np.full(num_frames, np.nan),
+        'max': np.full(num_frames, np.nan),
+        'mean': np.full(num_frames, np.nan),
+        'count': np.zeros(num_frames, dtype=np.int64),
+        'histogram': np.zeros((num_frames, bins), dtype=np.int64)
+    }
+
+    frame_size = int(np.prod(data.shape[1:]))
+    starts = range(0, frame_size, STATS_CHUNK)
+    finite = np.empty(min(frame_size, STATS_CHUNK), dtype=bool)
+
+    def valid_values(frame, start):
+        chunk = frame[start:start + STATS_CHUNK]
+        mask = finite[:chunk.size]
+        np.isfinite(chunk, out=mask)
+        return chunk[mask]
+
+    for t in range(num_frames):
+        frame = data[t].reshape(-1)
+        lo, hi, total, count = np.inf, -np.inf, 0.0, 0
+        for start in starts:
+            valid = valid_values(frame, start)
+            if valid.size:
+                lo = min(lo, valid.min())
+                hi = max(hi, valid.max())
+                total += valid.sum(dtype=np.float64)
+                count += valid.size
+        if count == 0:
+            continue
+
+        stats['min'][t] = lo
+        stats['max'][t] = hi
+        stats['mean'][t] = total / count
+        stats['count'][t] = count
+
+        if hi > lo:
+            histogram = stats['histogram'][t]
+            for start in starts:
+                valid = valid_values(frame, start)
+                scaled = np.subtract(valid, lo, dtype=np.result_type(valid, np.float32)).astype(np.float64)
+                scaled *= bins / (hi - lo)
+                index = scaled.astype(np.intp)
+                np.minimum(index, bins - 1, out=index)
+                histogram += np.bincount(index, minlength=bins)
+        else:
+            stats['histogram'][t, 0] = count
+
+    return stats
+
+
+def histogram_percentile(stats: Dict[str, np.ndarray],
+                         q: float,
+                         frames: Optional[Sequence[int]] = None,
+                         iterations: int = 50) -> float:
+    """
+    Estimate a percentile from per-frame histograms, without sorting the data.
+
+    Values are assumed uniformly distributed within each bin. The merged
+    cumulative distribution of the selected frames is inverted by bisection.
+
+    Args:
+        stats: Output of frame_statistics()
+        q: Percentile in [0, 100]
+        frames: Frame indices to include (all frames if None)
+        iterations: Bisection steps
+
+    Returns:
+        Approximate percentile value (NaN if there are no valid values)
+    """
+    if frames is None:
+        frames = np.arange(len(stats['count']))
+    frames = np.asarray(frames)
+    frames = frames[stats['count'][frames] > 0]
+    if frames.size == 0:
+        return float('nan')
+
+    lo = stats['min'][frames]
+    hi = stats['max'][frames]
+    hist = stats['histogram'][frames].astype(np.float64)
+    bins = hist.shape[1]
+    cumulative = np.concatenate([np.zeros((frames.size, 1)), np.cumsum(hist, axis=1)], axis=1)
+    width = np.where(hi > lo, (hi - lo) / bins, 1.0)
+    rows = np.arange(frames.size)
+    target = np.clip(q, 0, 100) / 100.0 * cumulative[:, -1].sum()
+
+    def count_below(value):
+        position = np.clip((value - lo) / width, 0, bins)
+        # Constant frames hold all their values at lo
+        position = np.where(hi > lo, position, np.where(value >= lo, bins, 0))
+        whole = np.minimum(position.astype(np.intp), bins - 1)
+        partial = position - whole
+        return (cumulative[rows, whole] + partial * hist[rows, whole]).sum()
+
+    low = float(lo.min())
+    high = float(hi.max())
+    for _ in range(iterations):
+        middle = 0.5 * (low + high)
+        if count_below(middle) < target:
+            low = middle
+        else:
+            high = middle
+    return 0.5 * (low + high)
+
+
+def parse_percentile(limit: Union[float, str, None]) -> Optional[float]:
+    """
+    Parse a percentile color limit such as 'p2' or 'p98.5'.
+
+    Args:
+        limit: Color limit as passed to add_variable
+
+    Returns:
+        Percentile as a float, or None if the limit is not a percentile string
+    """
+    if not isinstance(limit, str):
+        return None
+    match = _PERCENTILE_PATTERN.match(limit.strip().lower())
+    if match is None or float(match.group(1)) > 100:
+        raise ValueError(f"Invalid color limit '{limit}', expected a number or a percentile like 'p98'")
+    return float(match.group(1))
+
+
+def resolve_limit(limit: Union[float, str, None],
+                  stats: Dict[str, np.ndarray],
+                  default: str,
+                  frames: Optional[Sequence[int]] = None) -> float:
+    """
+    Turn a color limit (number, None or percentile string) into a value.
+
+    Args:
+        limit: Color limit as passed to add_variable
+        stats: Output of frame_statistics()
+        default: 'min' or 'max', used when limit is None
+        frames: Frame indices the limit applies to (all frames if None)
+
+    Returns:
+        Color limit value
+    """
+    percentile = parse_percentile(limit)
+    if percentile is not None:
+        return float(histogram_percentile(stats, percentile, frames))
+    if limit is not None:
+        return float(limit)
+    values = stats[default] if frames is None else stats[default][np.asarray(frames)]
+    if np.all(np.isnan(values)):
+        return float('nan')
+    return float(np.nanmin(values) if default == 'min' else np.nanmax(values))
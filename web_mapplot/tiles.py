@@ -0,0 +1,323 @@
+"""
+Offline XYZ tile pyramids for static hosting.
+
+Tiles use the standard Web Mercator ``{z}/{x}/{y}.png`` scheme. The pyramid
+is split into subtrees rooted at one zoom level and rendered by a process
+pool: each worker samples the grid only at the deepest zoom and builds every
+coarser tile of its subtree by 2x2 averaging of the four children, returning
+its root tile so the parent process can finish the levels above in the same
+way. Empty tiles are never written.
+
+Each frame directory holds a manifest with a fingerprint of everything that
+determines its pixels (data, grid, color limits and table, zoom range). A
+frame whose fingerprint matches a completed export is skipped; one that
+matches an interrupted export resumes and only encodes missing tiles; any
+other frame directory is cleared first, so stale tiles never survive.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .cache import fingerprint
+from .chunkstore import _atomic_write
+from .heatmap import MIN_ALPHA_DENSITY, colorize_density
+from .raster import MAX_MERCATOR_LAT, cell_edges, colorize, encode_png
+
+TILE_SIZE = 256
+
+TILE_MANIFEST_NAME = 'tiles.json'
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Geographic bounds of a tile.
+
+    Args:
+        z, x, y: Tile coordinates
+
+    Returns:
+        (west, south, east, north) in degrees
+    """
+    n = 2 ** z
+    west = x / n * 360 - 180
+    east = (x + 1) / n * 360 - 180
+    north = np.rad2deg(np.arctan(np.sinh(np.pi * (1 - 2 * y / n))))
+    south = np.rad2deg(np.arctan(np.sinh(np.pi * (1 - 2 * (y + 1) / n))))
+    return west, float(south), east, float(north)
+
+
+def tile_range(z: int, bounds: Tuple[float, float, float, float]) -> Tuple[int, int, int, int]:
+    """
+    Tiles of a zoom level that intersect a bounding box.
+
+    Args:
+        z: Zoom level
+        bounds: (west, south, east, north) in degrees
+
+    Returns:
+        (x_min, x_max, y_min, y_max), inclusive
+    """
+    west, south, east, north = bounds
+    n = 2 ** z
+
+    def tile_x(lon):
+        return int(np.clip(np.floor((lon + 180) / 360 * n), 0, n - 1))
+
+    def tile_y(lat):
+        lat = np.deg2rad(np.clip(lat, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+        return int(np.clip(np.floor((1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * n), 0, n - 1))
+
+    return tile_x(west), tile_x(east), tile_y(north), tile_y(south)
+
+
+def _axis_lookup(axis: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Ascending cell edges of a monotonic axis and the original index of each cell."""
+    order = np.arange(axis.size)
+    if axis.size > 1 and axis[-1] < axis[0]:
+        order = order[::-1]
+    return cell_edges(axis[order]), order
+
+
+def _lookup(edges: np.ndarray, order: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """Index of the cell containing each position, -1 outside the axis."""
+    cells = np.searchsorted(edges, positions, side='right') - 1
+    inside = (cells >= 0) & (cells < order.size)
+    return np.where(inside, order[np.clip(cells, 0, order.size - 1)], -1)
+
+
+def _window(edges: np.ndarray, order: np.ndarray, low: float, high: float) -> Optional[slice]:
+    """Slice of original axis indices whose cells overlap [low, high], widened by one cell."""
+    start = max(int(np.searchsorted(edges, low, side='right')) - 2, 0)
+    stop = min(int(np.searchsorted(edges, high, side='left')) + 1, order.size)
+    if stop <= start:
+        return None
+    indices = order[start:stop]
+    return slice(int(indices.min()), int(indices.max()) + 1)
+
+
+def _downsample(children: List[Optional[np.ndarray]]) -> np.ndarray:
+    """Average 2x2 blocks of four child tiles (NW, NE, SW, SE) into their parent, ignoring NaN."""
+    mosaic = np.full((2 * TILE_SIZE, 2 * TILE_SIZE), np.nan, dtype=np.float32)
+    for k, child in enumerate(children):
+        if child is not None:
+            row, col = divmod(k, 2)
+            mosaic[row * TILE_SIZE:(row + 1) * TILE_SIZE, col * TILE_SIZE:(col + 1) * TILE_SIZE] = child
+
+    blocks = mosaic.reshape(TILE_SIZE, 2, TILE_SIZE, 2)
+    valid = np.isfinite(blocks)
+    counts = valid.sum(axis=(1, 3))
+    sums = np.where(valid, blocks, 0).sum(axis=(1, 3))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan).astype(np.float32)
+
+
+class _TileJob:
+    """Everything a worker needs to render one subtree of one frame."""
+
+    def __init__(self, out_dir, lon_axis, lat_axis, frame, max_zoom, lut, vmin, vmax, levels, density):
+        self.out_dir = Path(out_dir)
+        self.lon_axis = lon_axis
+        self.lat_axis = lat_axis
+        self.lon_edges, self.lon_order = _axis_lookup(lon_axis)
+        self.lat_edges, self.lat_order = _axis_lookup(lat_axis)
+        self.frame = frame
+        self.max_zoom = max_zoom
+        self.lut = lut
+        self.vmin = vmin
+        self.vmax = vmax
+        self.levels = levels
+        self.density = density
+        self.bounds = (self.lon_edges[0], self.lat_edges[0], self.lon_edges[-1], self.lat_edges[-1])
+        self.written = 0
+
+    def subset(self, z: int, x: int, y: int) -> Optional['_TileJob']:
+        """Job restricted to the grid window under a tile (plus one cell), so workers get small inputs."""
+        west, south, east, north = tile_bounds(z, x, y)
+        cols = _window(self.lon_edges, self.lon_order, west, east)
+        rows = _window(self.lat_edges, self.lat_order, south, north)
+        if cols is None or rows is None:
+            return None
+        return _TileJob(self.out_dir, self.lon_axis[cols], self.lat_axis[rows], self.frame[rows, cols],
+                        self.max_zoom, self.lut, self.vmin, self.vmax, self.levels, self.density)
+
+    def intersects(self, z: int, x: int, y: int) -> bool:
+        west, south, east, north = tile_bounds(z, x, y)
+        return not (east < self.bounds[0] or west > self.bounds[2] or
+                    north < self.bounds[1] or south > self.bounds[3])
+
+    def sample(self, z: int, x: int, y: int) -> np.ndarray:
+        """Nearest-cell values at the pixel centres of a tile."""
+        n = 2 ** z * TILE_SIZE
+        pixels = np.arange(TILE_SIZE) + 0.5
+        lons = (x * TILE_SIZE + pixels) / n * 360 - 180
+        lats = np.rad2deg(np.arctan(np.sinh(np.pi * (1 - 2 * (y * TILE_SIZE + pixels) / n))))
+        cols = _lookup(self.lon_edges, self.lon_order, lons)
+        rows = _lookup(self.lat_edges, self.lat_order, lats)
+
+        tile = self.frame[np.ix_(np.maximum(rows, 0), np.maximum(cols, 0))].astype(np.float32)
+        tile[rows < 0, :] = np.nan
+        tile[:, cols < 0] = np.nan
+        return tile
+
+    def write(self, z: int, x: int, y: int, values: np.ndarray):
+        path = self.out_dir / str(z) / str(x) / f'{y}.png'
+        if path.exists():
+            return
+        if self.density:
+            rgba = colorize_density(values, self.lut)
+        else:
+            rgba = colorize(values, self.lut, self.vmin, self.vmax, self.levels)
+        _atomic_write(path, encode_png(rgba))
+        self.written += 1
+
+    def render(self, z: int, x: int, y: int) -> Optional[np.ndarray]:
+        """Render a tile and everything below it; returns its values, or None if empty."""
+        if not self.intersects(z, x, y):
+            return None
+        if z == self.max_zoom:
+            values = self.sample(z, x, y)
+        else:
+            children = [self.render(z + 1, 2 * x + dx, 2 * y + dy) for dy in (0, 1) for dx in (0, 1)]
+            if all(child is None for child in children):
+                return None
+            values = _downsample(children)
+
+        if not np.isfinite(values).any():
+            return None
+        self.write(z, x, y, values)
+        return values
+
+
+def _render_subtree(task: Tuple[_TileJob, Tuple[int, int, int]]) -> Tuple[Optional[np.ndarray], int]:
+    job, (z, x, y) = task
+    values = job.render(z, x, y)
+    return values, job.written
+
+
+def export_pyramid(out_dir: Path,
+                   lon_axis: np.ndarray,
+                   lat_axis: np.ndarray,
+                   frame: np.ndarray,
+                   zoom_range: Tuple[int, int],
+                   lut: np.ndarray,
+                   vmin: float,
+                   vmax: float,
+                   levels: Optional[int] = None,
+                   density: bool = False,
+                   executor: Optional[ProcessPoolExecutor] = None,
+                   workers: int = 1) -> int:
+    """
+    Write the tile pyramid of one frame.
+
+    Args:
+        out_dir: Directory receiving ``{z}/{x}/{y}.png``
+        lon_axis: Longitude axis of the rectilinear grid
+        lat_axis: Latitude axis of the rectilinear grid
+        frame: 2D array (lat, lon)
+        zoom_range: (min_zoom, max_zoom), inclusive
+        lut: Color table from raster.color_lut()
+        vmin: Lower color limit
+        vmax: Upper color limit
+        levels: Number of color bands (continuous colors if None)
+        density: The frame holds normalized kernel densities (heatmap.kde_surface),
+                colored with opacity rising with density; cells too faint to
+                show are treated as empty so their tiles are skipped
+        executor: Process pool used for the subtrees (inline if None)
+        workers: Number of pool workers, used to choose the subtree size
+
+    Returns:
+        Number of tiles written
+    """
+    out_dir = Path(out_dir)
+    min_zoom, max_zoom = zoom_range
+    digest = hashlib.blake2b(digest_size=20)
+    for array in (frame, lon_axis, lat_axis, lut):
+        digest.update(fingerprint(np.asarray(array)).encode())
+    digest.update(repr((float(vmin), float(vmax), levels, density, int(min_zoom), int(max_zoom))).encode())
+    frame_fingerprint = digest.hexdigest()
+
+    manifest_path = out_dir / TILE_MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get('fingerprint') == frame_fingerprint:
+        if manifest.get('complete'):
+            return 0
+    elif out_dir.exists():
+        # Tiles rendered from other inputs: drop them all, including ones outside the new footprint
+        for path in out_dir.iterdir():
+            if path.is_dir() and path.name.isdigit():
+                shutil.rmtree(path)
+
+    def write_manifest(complete: bool):
+        manifest = {'fingerprint': frame_fingerprint, 'complete': complete}
+        _atomic_write(manifest_path, json.dumps(manifest).encode('utf-8'))
+
+    write_manifest(False)
+    if density:
+        frame = np.where(frame >= MIN_ALPHA_DENSITY, frame, np.nan)
+    job = _TileJob(out_dir, lon_axis, lat_axis, frame, max_zoom, lut, vmin, vmax, levels, density)
+
+    # Split at the first level with enough subtrees to keep every worker busy
+    split = min_zoom
+    while split < max_zoom:
+        x0, x1, y0, y1 = tile_range(split, job.bounds)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) >= 4 * workers:
+            break
+        split += 1
+
+    x0, x1, y0, y1 = tile_range(split, job.bounds)
+    tasks = []
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            subtree = job.subset(split, x, y)
+            if subtree is not None:
+                tasks.append((subtree, (split, x, y)))
+    roots = [root for _, root in tasks]
+    if executor is None:
+        results = [_render_subtree(task) for task in tasks]
+    else:
+        results = list(executor.map(_render_subtree, tasks))
+
+    written = sum(count for _, count in results)
+    level = {root[1:]: values for root, (values, _) in zip(roots, results) if values is not None}
+
+    # Finish the levels above the split from the subtree roots
+    for z in range(split - 1, min_zoom - 1, -1):
+        parents = {}
+        for (x, y) in {(x // 2, y // 2) for (x, y) in level}:
+            children = [level.get((2 * x + dx, 2 * y + dy)) for dy in (0, 1) for dx in (0, 1)]
+            values = _downsample(children)
+            if np.isfinite(values).any():
+                job.written = 0
+                job.write(z, x, y, values)
+                written += job.written
+                parents[(x, y)] = values
+        level = parents
+
+    write_manifest(True)
+    return written
+
+
+def default_processes() -> int:
+    """Number of worker processes used when none is given."""
+    return os.cpu_count() or 1
+
+
+def tile_index(name: str, zoom_range: Tuple[int, int], bounds: Tuple[float, float, float, float]) -> Dict:
+    """Page metadata for a tiled variable; URLs are relative to the export directory."""
+    west, south, east, north = bounds
+    return {
+        'url': f'{quote(name)}/{{t}}/{{z}}/{{x}}/{{y}}.png',
+        'min_zoom': int(zoom_range[0]),
+        'max_zoom': int(zoom_range[1]),
+        'bounds': [[float(south), float(west)], [float(north), float(east)]]
+    }
@@ -0,0 +1,366 @@
+"""
+Filled contour bands as shared-boundary (TopoJSON-like) topology.
+
+Contour rings are traced in grid index space with marching squares, one
+level per threshold. The region at or above threshold k is bounded by the
+rings of level k, so band k (between thresholds k and k+1) is the even-odd
+fill of the rings of levels k and k+1: every ring is stored once and
+referenced by the two bands it separates. Rings are split into arcs where
+they join or leave the grid boundary, and boundary runs are cut at every
+level's junctions so stretches of the domain edge used by several levels
+are stored once as well. Arc coordinates are quantized to a fraction of a
+grid cell and packed with the shared geometry codec.
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .encoding import encode_geometry
+
+# Quantization steps per grid cell for arc coordinates
+DEFAULT_QUANTIZATION = 16
+
+# Cell corners as (x, y) offsets and bit values: top-left, top-right, bottom-right, bottom-left
+_CORNERS = [((0, 0), 8), ((1, 0), 4), ((1, 1), 2), ((0, 1), 1)]
+
+# Cell edges (top, right, bottom, left) as pairs of corner indices, and their midpoints
+_EDGE_CORNERS = [(0, 1), (1, 2), (3, 2), (0, 3)]
+_EDGE_MIDPOINTS = [(0.5, 0.0), (1.0, 0.5), (0.5, 1.0), (0.0, 0.5)]
+
+# Edges adjacent to each corner
+_CORNER_EDGES = [(0, 3), (0, 1), (1, 2), (2, 3)]
+
+
+def _oriented(e1: int, e2: int, ref: Tuple[float, float], ref_inside: bool) -> Tuple[int, int]:
+    """Order a segment so the inside of the region is always on the same side."""
+    (x1, y1), (x2, y2) = _EDGE_MIDPOINTS[e1], _EDGE_MIDPOINTS[e2]
+    cross = (x2 - x1) * (ref[1] - y1) - (y2 - y1) * (ref[0] - x1)
+    return (e1, e2) if (cross > 0) == ref_inside else (e2, e1)
+
+
+def _segment_table() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Marching squares segments for every (case, centre inside) combination.
+
+    Returns:
+        Tuple of (segment count, start edges, end edges), indexed by case * 2 + centre flag
+    """
+    count = np.zeros(32, dtype=np.int64)
+    starts = np.zeros((32, 2), dtype=np.int64)
+    ends = np.zeros((32, 2), dtype=np.int64)
+    for case in range(16):
+        inside = [bool(case & bit) for _, bit in _CORNERS]
+        crossing = [e for e, (a, b) in enumerate(_EDGE_CORNERS) if inside[a] != inside[b]]
+        for centre in (0, 1):
+            segments = []
+            if len(crossing) == 2:
+                points = [_CORNERS[k][0] for k in range(4) if inside[k]]
+                ref = (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+                segments.append(_oriented(crossing[0], crossing[1], ref, True))
+            elif len(crossing) == 4:
+                # Saddle: the centre decides which pair of corners is cut off
+                for k in range(4):
+                    if inside[k] != bool(centre):
+                        segments.append(_oriented(*_CORNER_EDGES[k], _CORNERS[k][0], inside[k]))
+            index = case * 2 + centre
+            count[index] = len(segments)
+            for s, (e1, e2) in enumerate(segments):
+                starts[index, s], ends[index, s] = e1, e2
+    return count, starts, ends
+
+
+_SEGMENT_COUNT, _SEGMENT_STARTS, _SEGMENT_ENDS = _segment_table()
+
+
+def _crossing_fraction(a: np.ndarray, b: np.ndarray, threshold: float) -> np.ndarray:
+    """Position of the threshold between two node values; padded (-inf) nodes snap to the finite one."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = (threshold - a) / (b - a)
+    fraction = np.where(np.isfinite(a) & np.isfinite(b), fraction, np.where(np.isfinite(a), 0.0, 1.0))
+    return np.clip(fraction, 0.0, 1.0)
+
+
+def trace_rings(values: np.ndarray, threshold: float) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Trace the closed rings bounding the region at or above a threshold.
+
+    The grid is padded with -inf (NaN counts as -inf too), so every ring is
+    closed; rings along the domain edge run exactly through its nodes. All
+    rings have the region on the same side.
+
+    Args:
+        values: 2D array (lat, lon)
+        threshold: Contour threshold
+
+    Returns:
+        List of (points, on_boundary) per ring: points is an (n, 2) array of
+        (row, column) grid coordinates, on_boundary[k] tells whether the
+        segment from point k to point k+1 (cyclically) lies on the grid boundary
+    """
+    padded = np.full((values.shape[0] + 2, values.shape[1] + 2), -np.inf)
+    padded[1:-1, 1:-1] = np.where(np.isnan(values), -np.inf, values)
+    rows, cols = padded.shape
+    inside = padded >= threshold
+
+    tl, tr = inside[:-1, :-1], inside[:-1, 1:]
+    br, bl = inside[1:, 1:], inside[1:, :-1]
+    case = tl * 8 + tr * 4 + br * 2 + bl * 1
+    with np.errstate(invalid='ignore'):
+        centre = (padded[:-1, :-1] + padded[:-1, 1:] + padded[1:, 1:] + padded[1:, :-1]) / 4 >= threshold
+    index = case * 2 + centre
+
+    cell_r, cell_c = np.nonzero(_SEGMENT_COUNT[index] > 0)
+    if cell_r.size == 0:
+        return []
+    cell_index = index[cell_r, cell_c]
+    second = _SEGMENT_COUNT[cell_index] == 2
+    seg_r = np.concatenate([cell_r, cell_r[second]])
+    seg_c = np.concatenate([cell_c, cell_c[second]])
+    seg_start = np.concatenate([_SEGMENT_STARTS[cell_index, 0], _SEGMENT_STARTS[cell_index[second], 1]])
+    seg_end = np.concatenate([_SEGMENT_ENDS[cell_index, 0], _SEGMENT_ENDS[cell_index[second], 1]])
+
+    # Global edge ids: horizontal edges first, then vertical ones
+    num_horizontal = rows * (cols - 1)
+
+    def edge_id(r, c, edge):
+        return np.select(
+            [edge == 0, edge == 1, edge == 2],
+            [r * (cols - 1) + c, num_horizontal + r * cols + c + 1, (r + 1) * (cols - 1) + c],
+            num_horizontal + r * cols + c)
+
+    start_ids = edge_id(seg_r, seg_c, seg_start)
+    end_ids = edge_id(seg_r, seg_c, seg_end)
+    lookup = np.full(num_horizontal + (rows - 1) * cols, -1, dtype=np.int64)
+    lookup[start_ids] = np.arange(start_ids.size)
+    following = lookup[end_ids]
+
+    # Start point of every segment, in padded grid coordinates
+    horizontal = start_ids < num_horizontal
+    hr, hc = np.divmod(np.minimum(start_ids, num_horizontal - 1), cols - 1)
+    vr, vc = np.divmod(np.maximum(start_ids - num_horizontal, 0), cols)
+    point_r = np.where(horizontal, hr, vr).astype(np.float64)
+    point_c = np.where(horizontal, hc, vc).astype(np.float64)
+    a = padded[point_r.astype(np.int64), point_c.astype(np.int64)]
+    b = np.where(horizontal,
+                 padded[hr, np.minimum(hc + 1, cols - 1)],
+                 padded[np.minimum(vr + 1, rows - 1), vc])
+    fraction = _crossing_fraction(a, b, threshold)
+    point_c = np.where(horizontal, point_c + fraction, point_c) - 1
+    point_r = np.where(horizontal, point_r, point_r + fraction) - 1
+    boundary = (seg_r == 0) | (seg_c == 0) | (seg_r == rows - 2) | (seg_c == cols - 2)
+
+    rings = []
+    visited = bytearray(start_ids.size)
+    following = following.tolist()
+    for first in range(start_ids.size):
+        if visited[first]:
+            continue
+        order = []
+        s = first
+        while not visited[s]:
+            visited[s] = 1
+            order.append(s)
+            s = following[s]
+        order = np.array(order)
+        rings.append((np.column_stack([point_r[order], point_c[order]]), boundary[order]))
+    return rings
+
+
+class _Perimeter:
+    """Quantized coordinates along the grid boundary, walked from node (0, 0) along the first row."""
+
+    def __init__(self, ny: int, nx: int, quantization: int):
+        self.ny, self.nx, self.q = ny, nx, quantization
+        self.sides = np.cumsum([0, nx - 1, ny - 1, nx - 1, ny - 1]) * quantization
+        self.length = int(self.sides[-1])
+
+    def position(self, row: int, col: int) -> int:
+        q, ny, nx = self.q, self.ny, self.nx
+        if row == 0:
+            return col
+        if col == (nx - 1) * q:
+            return int(self.sides[1]) + row
+        if row == (ny - 1) * q:
+            return int(self.sides[2]) + (nx - 1) * q - col
+        return (int(self.sides[3]) + (ny - 1) * q - row) % self.length
+
+    def point(self, s: int) -> Tuple[int, int]:
+        q, ny, nx = self.q, self.ny, self.nx
+        s %= self.length
+        side = int(np.searchsorted(self.sides, s, side='right')) - 1
+        offset = s - int(self.sides[side])
+        return [(0, offset), (offset, (nx - 1) * q), ((ny - 1) * q, (nx - 1) * q - offset),
+                ((ny - 1) * q - offset, 0)][side]
+
+    def path(self, start: int, stop: int) -> List[Tuple[int, int]]:
+        """Points from start to stop (forward, stop may exceed the length to wrap), including nodes between."""
+        nodes = range((start // self.q + 1) * self.q, stop, self.q)
+        return [self.point(start)] + [self.point(s) for s in nodes] + [self.point(stop)]
+
+
+def _boundary_run(perimeter: _Perimeter, chunk: np.ndarray) -> Optional[Tuple[str, int, int]]:
+    """
+    Describe a stretch of ring along the grid boundary by its perimeter positions.
+
+    Returns:
+        ('run', begin, end) with end - begin the signed distance walked (its
+        magnitude may reach the perimeter length), or None for a single point
+    """
+    length = perimeter.length
+    positions = [perimeter.position(*point) for point in chunk]
+    walked = 0
+    for a, b in zip(positions[:-1], positions[1:]):
+        step = (b - a) % length
+        walked += step if step <= length / 2 else step - length
+    if walked == 0:
+        return None
+    return 'run', positions[0], positions[0] + walked
+
+
+def _xy(points: Sequence[Tuple[int, int]]) -> np.ndarray:
+    """Swap (row, col) points to (x, y) with x = column, y = row."""
+    return np.asarray(points, dtype=np.int64)[:, ::-1]
+
+
+def contour_topology(values: np.ndarray,
+                     thresholds: Sequence[float],
+                     quantization: int = DEFAULT_QUANTIZATION) -> Dict:
+    """
+    Build the shared-arc topology of one frame's filled contour levels.
+
+    Args:
+        values: 2D array (lat, lon)
+        thresholds: Ascending contour thresholds
+        quantization: Quantization steps per grid cell
+
+    Returns:
+        Dictionary with 'thresholds', 'arcs' (encode_geometry() payload of
+        (x, y) grid index coordinates, x along columns and y along rows) and
+        'levels' (per threshold, a list of rings, each a list of arc
+        references; ~k refers to arc k reversed)
+    """
+    ny, nx = values.shape
+    perimeter = _Perimeter(ny, nx, quantization)
+    arcs: List[np.ndarray] = []
+    boundary_pieces: Dict[Tuple[int, int], int] = {}
+
+    # First pass: split every ring into interior chains and boundary runs
+    level_parts = []
+    cuts = set()
+    for threshold in thresholds:
+        rings = []
+        for points, on_boundary in trace_rings(values, threshold):
+            q = np.rint(points * quantization).astype(np.int64)
+            if not on_boundary.any():
+                rings.append([('chain', np.vstack([q, q[:1]]))])
+                continue
+            if on_boundary.all():
+                rings.append([('loop',)])
+                continue
+            # Rotate so the ring starts where a boundary run begins
+            starts = np.flatnonzero(on_boundary & ~np.roll(on_boundary, 1))
+            shift = int(starts[0])
+            q = np.roll(q, -shift, axis=0)
+            flags = np.roll(on_boundary, -shift)
+            q = np.vstack([q, q[:1]])
+
+            parts = []
+            k = 0
+            n = flags.size
+            while k < n:
+                stop = k
+                while stop < n and flags[stop] == flags[k]:
+                    stop += 1
+                chunk = q[k:stop + 1]
+                if flags[k]:
+                    run = _boundary_run(perimeter, chunk)
+                    if run is not None:
+                        parts.append(run)
+                        cuts.update((run[1] % perimeter.length, run[2] % perimeter.length))
+                else:
+                    parts.append(('chain', chunk))
+                k = stop
+            rings.append(parts)
+        level_parts.append(rings)
+
+    cut_list = np.array(sorted(cuts), dtype=np.int64)
+
+    def add_chain(chain) -> int:
+        keep = np.ones(len(chain), dtype=bool)
+        keep[1:] = np.any(chain[1:] != chain[:-1], axis=1)
+        arcs.append(_xy(chain[keep]))
+        return len(arcs) - 1
+
+    def add_run(begin: int, stop: int) -> List[int]:
+        # Forward stretch of the boundary from begin to stop (stop > begin, may wrap),
+        # as pieces between consecutive junctions, each stored once
+        length = perimeter.length
+        inner = [int(c) for c in np.concatenate([cut_list, cut_list + length, cut_list + 2 * length])
+                 if begin < c < stop]
+        refs = []
+        for a, b in zip([begin] + inner, inner + [stop]):
+            key = (a % length, b - a)
+            if key not in boundary_pieces:
+                arcs.append(_xy(perimeter.path(a, b)))
+                boundary_pieces[key] = len(arcs) - 1
+            refs.append(boundary_pieces[key])
+        return refs
+
+    # Second pass: emit arcs, cutting boundary runs at every level's junctions
+    levels = []
+    for rings in level_parts:
+        level = []
+        for parts in rings:
+            refs = []
+            for part in parts:
+                if part[0] == 'chain':
+                    refs.append(add_chain(part[1]))
+                elif part[0] == 'loop':
+                    begin = int(cut_list[0]) if cut_list.size else 0
+                    refs.extend(add_run(begin, begin + perimeter.length))
+                elif part[1] <= part[2]:
+                    refs.extend(add_run(part[1], part[2]))
+                else:
+                    # Walked against the perimeter direction: reference the forward pieces reversed
+                    refs.extend(~ref for ref in reversed(add_run(part[2], part[1])))
+            level.append(refs)
+        levels.append(level)
+
+    return {
+        'thresholds': [float(t) for t in thresholds],
+        'arcs': encode_geometry([arc / quantization for arc in arcs], precision=1.0 / quantization),
+        'levels': levels
+    }
+
+
+def filled_contour_topology(data: np.ndarray,
+                            vmin: float,
+                            vmax: float,
+                            levels: int = 10,
+                            frame_ranges: Optional[Sequence[Sequence[float]]] = None,
+                            quantization: int = DEFAULT_QUANTIZATION) -> Dict:
+    """
+    Build the filled contour topology of every frame.
+
+    Thresholds match the browser's filled contours: ``levels`` values evenly
+    spaced from vmin (inclusive) towards vmax (exclusive).
+
+    Args:
+        data: 3D array (time, lat, lon)
+        vmin: Lower color limit
+        vmax: Upper color limit
+        levels: Number of contour levels
+        frame_ranges: Optional per-frame (vmin, vmax) pairs overriding vmin/vmax
+        quantization: Quantization steps per grid cell
+
+    Returns:
+        Dictionary with one contour_topology() per frame in 'frames'
+    """
+    if quantization < 1:
+        raise ValueError("quantization must be at least 1")
+    frames = []
+    for t in range(data.shape[0]):
+        lo, hi = frame_ranges[t] if frame_ranges is not None else (vmin, vmax)
+        thresholds = lo + (hi - lo) / levels * np.arange(levels) if hi > lo else np.array([lo])
+        frames.append(contour_topology(data[t], thresholds, quantization))
+    return {'frames': frames}